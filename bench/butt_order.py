@@ -0,0 +1,41 @@
+"""Search of order of Butterworth filter: FFT of 2 hours impulse response
+vs. frequency response on grid."""
+import os
+import sys
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab import filtration as flt
+from test import test_filtration as ref
+
+CASES = [
+    ((1.93, 2.14), 12.5),
+    ((3.84, 4.0), 12.5),
+    ((5.0, 15.0), 100.0),
+]
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    warnings.simplefilter('ignore')
+
+    print(f"{'band, Hz':>14} {'rate, Hz':>9} {'order':>6} "
+          f"{'full FFT, ms':>13} {'grid, ms':>9}")
+    for band, sample_rate in CASES:
+        t_ref = timeit.timeit(
+            lambda: ref.ref_butt_bandpass_order(band, sample_rate),
+            number=1) * 1e3
+        t_new = timeit.timeit(
+            lambda: flt.find_butt_bandpass_order(band, sample_rate),
+            number=1) * 1e3
+        order = flt.find_butt_bandpass_order(band, sample_rate)
+        print(f"{str(band):>14} {sample_rate:>9} {order:>6} "
+              f"{t_ref:>13.1f} {t_new:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Detection of extremums and zeros: loops vs. vectorized functions."""
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab import modulation as mod
+from test import test_modulation as ref
+
+SAMPLES = 10**6
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    ts = np.arange(SAMPLES) / 1000
+    xs = np.cos(2 * np.pi * 3 * ts) + np.random.normal(0, 0.1, SAMPLES)
+
+    cases = [
+        ('envelope_by_extremums',
+         lambda: ref.ref_envelope_by_extremums(xs, ts),
+         lambda: mod.envelope_by_extremums(xs, tdata=ts)),
+        ('freq_by_extremums',
+         lambda: ref.ref_freq_by_extremums(xs, 1000),
+         lambda: mod.freq_by_extremums(xs, 1000)),
+        ('freq_by_zeros',
+         lambda: ref.ref_freq_by_zeros(xs, 1000),
+         lambda: mod.freq_by_zeros(xs, 1000)),
+        ('wave_lens',
+         lambda: ref.ref_wave_lens(xs, ts),
+         lambda: mod.wave_lens(xs, ts)),
+    ]
+
+    print(f"{SAMPLES} samples")
+    print(f"{'function':>22} {'loop, ms':>10} {'vectorized, ms':>16}")
+    for name, func_loop, func_vect in cases:
+        t_loop = timeit.timeit(func_loop, number=1) * 1e3
+        t_vect = timeit.timeit(func_vect, number=1) * 1e3
+        print(f"{name:>22} {t_loop:>10.1f} {t_vect:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
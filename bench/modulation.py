@@ -0,0 +1,57 @@
+"""Generation of test signals: loops vs. vectorized mode."""
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab import modulation as mod
+
+LENGTH = 10
+SAMPLE_RATE = 50000
+
+
+def amp_func(t):
+    """Amplitude."""
+    return 1 + 0.5 * np.cos(2 * np.pi * 0.5 * t)
+
+
+def freq_func(t):
+    """Frequency."""
+    return 1000 + 100 * np.sin(2 * np.pi * 2 * t)
+
+
+def noise(size=None):
+    """Noise."""
+    return np.random.normal(0, 0.01, size)
+
+
+GENERATORS = {
+    'harm': lambda v: mod.harm(
+        LENGTH, SAMPLE_RATE, 1, 1000, noise_amp=noise, vectorized=v),
+    'amp_mod': lambda v: mod.amp_mod(
+        LENGTH, SAMPLE_RATE, amp_func, 1000, noise_amp=noise, vectorized=v),
+    'freq_mod': lambda v: mod.freq_mod(
+        LENGTH, SAMPLE_RATE, 1, freq_func, noise_ph=noise, vectorized=v),
+    'phase_mod': lambda v: mod.phase_mod(
+        LENGTH, SAMPLE_RATE, 1, 1000, amp_func, vectorized=v),
+    'freq_amp_mod': lambda v: mod.freq_amp_mod(
+        LENGTH, SAMPLE_RATE, amp_func, freq_func, vectorized=v),
+}
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    print(f"{LENGTH} sec, {SAMPLE_RATE} Hz")
+    print(f"{'function':>14} {'loop, ms':>10} {'vectorized, ms':>16}")
+    for name, gen in GENERATORS.items():
+        t_loop = timeit.timeit(lambda: gen(False), number=1) * 1e3
+        t_vect = timeit.timeit(lambda: gen(True), number=1) * 1e3
+        print(f"{name:>14} {t_loop:>10.1f} {t_vect:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time of building the plan vs. number of nodes."""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab.flow.activity import Work
+from dsplab.flow.plan import WorkNode, Plan, get_plan_from_dict
+
+
+def inc(x):
+    """Worker."""
+    return x + 1
+
+
+def build_by_nodes(nodes_number):
+    """Build plan with chain of nodes adding nodes in reversed order."""
+    plan = Plan()
+    nodes = [WorkNode(Work(worker=inc)) for _ in range(nodes_number)]
+    for prev, node in zip(nodes[-2::-1], nodes[:0:-1]):
+        plan.add_node(node, inputs=[prev])
+    plan.add_node(nodes[0])
+    plan.inputs = [nodes[0]]
+    plan.outputs = [nodes[-1]]
+
+    return plan
+
+
+def get_plan_dict(nodes_number):
+    """Return dictionary with chain of nodes."""
+    worker = {'function': 'inc'}
+    nodes = [{'id': '0', 'work': {'worker': worker}}]
+    for i in range(1, nodes_number):
+        nodes.append({
+            'id': str(i),
+            'inputs': [str(i - 1)],
+            'work': {'worker': worker},
+        })
+
+    return {
+        'nodes': nodes,
+        'inputs': ['0'],
+        'outputs': [str(nodes_number - 1)],
+    }
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    print(f"{'nodes':>8} {'add_node, ms':>14} {'from dict, ms':>14}")
+    for nodes_number in [100, 300, 1000, 2000]:
+        t_nodes = timeit.timeit(lambda: build_by_nodes(nodes_number),
+                                number=1) * 1e3
+
+        plan_dict = get_plan_dict(nodes_number)
+        t_dict = timeit.timeit(lambda: get_plan_from_dict(plan_dict),
+                               number=1) * 1e3
+
+        print(f"{nodes_number:>8} {t_nodes:>14.1f} {t_dict:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
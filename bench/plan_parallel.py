@@ -0,0 +1,60 @@
+"""Sequential and parallel execution of plan with independent branches."""
+import os
+import sys
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab.flow.activity import Work
+from dsplab.flow.plan import WorkNode, PackNode, Plan
+from dsplab.filtration import butter_filter
+
+
+def source(x):
+    """Make signal."""
+    return np.random.randn(x)
+
+
+def analysis(xs):
+    """Heavy analysis of signal."""
+    return butter_filter(xs, 1, [0.1, 0.2], 6).std()
+
+
+def get_plan(branches_number, executor=None):
+    """Return plan with branches."""
+    plan = Plan(executor=executor)
+    src = WorkNode(Work(worker=source))
+    branches = [
+        WorkNode(Work(worker=analysis), inputs=[src])
+        for _ in range(branches_number)
+    ]
+    pack = PackNode(inputs=branches)
+    plan.add_nodes([src, *branches, pack])
+    plan.inputs = [src]
+    plan.outputs = [pack]
+
+    return plan
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    branches_number = 12
+    samples_number = 2**21
+    workers = os.cpu_count()
+
+    plan = get_plan(branches_number)
+    t_seq = timeit.timeit(lambda: plan([samples_number]), number=3) / 3
+    print(f"sequential: {t_seq * 1e3:.1f} ms")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        plan = get_plan(branches_number, executor)
+        t_par = timeit.timeit(lambda: plan([samples_number]), number=3) / 3
+    print(f"threads ({workers}): {t_par * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-call overhead of Plan.run() and Plan.quick_run() vs. number of
+nodes."""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab.flow.activity import Work
+from dsplab.flow.plan import WorkNode, Plan
+
+
+def inc(x):
+    """Worker."""
+    return x + 1
+
+
+def hook():
+    """Empty hook."""
+
+
+def get_chain_plan(nodes_number, quick):
+    """Return plan with chain of nodes.
+
+    Nodes are added in reversed order, it is the worst case for
+    detection of ready nodes by polling.
+    """
+    plan = Plan(quick=quick)
+    nodes = [WorkNode(Work(worker=inc)) for _ in range(nodes_number)]
+    for prev, node in zip(nodes[-2::-1], nodes[:0:-1]):
+        plan.add_node(node, inputs=[prev])
+    plan.add_node(nodes[0])
+
+    for node in nodes:
+        node.set_start_hook(hook)
+        node.set_stop_hook(hook)
+
+    plan.set_progress_hook(hook)
+    plan.inputs = [nodes[0]]
+    plan.outputs = [nodes[-1]]
+
+    return plan
+
+
+def measure(nodes_number, quick, number=20):
+    """Return time of one call of plan (sec)."""
+    plan = get_chain_plan(nodes_number, quick)
+
+    return timeit.timeit(lambda: plan([0]), number=number) / number
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    print(f"{'nodes':>8} {'run, us':>12} {'quick_run, us':>14}")
+    for nodes_number in [10, 30, 100, 300, 1000]:
+        t_run = measure(nodes_number, quick=False) * 1e6
+        t_quick = measure(nodes_number, quick=True) * 1e6
+        print(f"{nodes_number:>8} {t_run:>12.1f} {t_quick:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Prony decomposition in sliding window: prony_decomp() for every
+window vs. PronyTracker."""
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('.'))
+
+# pylint: disable=wrong-import-position
+from dsplab.prony import prony_decomp, PronyTracker
+
+SAMPLES = 2000
+NCOMP = 4
+
+
+def main():
+    """Run benchmark."""
+    print(__doc__)
+    xs = np.random.normal(size=SAMPLES + 2000)
+
+    print(f"{SAMPLES} samples, {NCOMP} components")
+    print(f"{'window':>8} {'prony_decomp, us':>18} {'tracker, us':>13}")
+    for nwin in [100, 400, 2000]:
+        windows = np.lib.stride_tricks.sliding_window_view(xs, nwin)
+        t_full = timeit.timeit(
+            lambda: [prony_decomp(w, NCOMP) for w in windows[:SAMPLES]],
+            number=1)
+
+        tracker = PronyTracker(nwin, NCOMP)
+        for sample in xs[:nwin]:
+            tracker(sample)
+        t_tracker = timeit.timeit(
+            lambda: [tracker(x) for x in xs[nwin:nwin + SAMPLES]],
+            number=1)
+
+        print(f"{nwin:>8} {t_full / SAMPLES * 1e6:>18.1f} "
+              f"{t_tracker / SAMPLES * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,12 +15,19 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Filtration of signals."""
 
+from functools import lru_cache
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import scipy.signal as sig
 from scipy.fftpack import fft, ifft
 
+CHUNK_LEN = 65536
+CACHE_SIZE = 64
+BATCH_SIZE = 256
+ORDER_FREQS_NUM = 8192
 
-def _stupid_filter(xdata, fr_resp):
+
+def _stupid_filter(xdata, fr_resp, axis=-1):
     """Filter signal using setted frequency response.
 
     Parameters
@@ -29,18 +36,23 @@ def _stupid_filter(xdata, fr_resp):
         Signal values.
     fr_resp: np.array
         Frequency response of ideal filter.
+    axis: int
+        Axis of time (default is -1).
 
     Returns
     -------
     : np.array
         Filteres signal.
     """
-    spectrum = fft(xdata * sig.windows.tukey(len(xdata)))
+    xdata = np.moveaxis(np.asarray(xdata), axis, -1)
+    spectrum = fft(xdata * sig.windows.tukey(xdata.shape[-1]))
 
-    return np.real(ifft(spectrum * fr_resp))
+    return np.moveaxis(np.real(ifft(spectrum * fr_resp)), -1, axis)
 
 
-def stupid_lowpass_filter(xdata, sample_rate, cutoff):
+def stupid_lowpass_filter(xdata, sample_rate, cutoff, axis=-1, ntaps=None,
+                          chunk_len=CHUNK_LEN):
+    # pylint: disable=too-many-positional-arguments
     """Return low-pass filtered signal.
 
     Parameters
@@ -51,21 +63,35 @@ def stupid_lowpass_filter(xdata, sample_rate, cutoff):
         Sampling frequency.
     cutoff: float
         Cutoff frequency.
+    axis: int
+        Axis of time (default is -1).
+    ntaps: int
+        If set, the signal is filtered by blocks with FIR filter of
+        ntaps length (see block_filter()) instead of the FFT of whole
+        signal.
+    chunk_len: int
+        Length of chunks for filtering by blocks (see block_filter()).
 
     Returns
     -------
     : np.array
         Filteres signal.
     """
-    num = len(xdata)
+    if ntaps:
+        return block_filter(xdata, sample_rate, (0, cutoff), ntaps,
+                            axis=axis, chunk_len=chunk_len)
+
+    num = np.shape(xdata)[axis]
     fr_resp = np.zeros(num)
     freqs = np.fft.fftfreq(num, 1 / sample_rate)
     fr_resp[abs(freqs) <= cutoff] = 1
 
-    return _stupid_filter(xdata, fr_resp)
+    return _stupid_filter(xdata, fr_resp, axis)
 
 
-def stupid_bandpass_filter(xdata, sample_rate, bandpass):
+def stupid_bandpass_filter(xdata, sample_rate, bandpass, axis=-1,
+                           ntaps=None, chunk_len=CHUNK_LEN):
+    # pylint: disable=too-many-positional-arguments
     """Return low-pass filtered signal.
 
     Parameters
@@ -76,23 +102,207 @@ def stupid_bandpass_filter(xdata, sample_rate, bandpass):
         Sampling frequency.
     bandpass: np.array of 2 floats
         Bounds of bandpass (Hz).
+    axis: int
+        Axis of time (default is -1).
+    ntaps: int
+        If set, the signal is filtered by blocks with FIR filter of
+        ntaps length (see block_filter()) instead of the FFT of whole
+        signal.
+    chunk_len: int
+        Length of chunks for filtering by blocks (see block_filter()).
 
     Returns
     -------
     : np.array
         Filteres signal.
     """
-    num = len(xdata)
+    if ntaps:
+        return block_filter(xdata, sample_rate, bandpass, ntaps, axis=axis,
+                            chunk_len=chunk_len)
+
+    num = np.shape(xdata)[axis]
     fr_resp = np.zeros(num)
     freqs = np.fft.fftfreq(num, 1 / sample_rate)
     fr_resp[(abs(freqs) >= bandpass[0]) & (abs(freqs) <= bandpass[1])] = 1
 
-    return _stupid_filter(xdata, fr_resp)
+    return _stupid_filter(xdata, fr_resp, axis)
+
+
+def block_filter(xdata, sample_rate, band, ntaps=255, nfft=None, axis=-1,
+                 chunk_len=CHUNK_LEN):
+    # pylint: disable=too-many-locals,too-many-positional-arguments
+    """Filter signal by blocks with FIR filter approximating ideal
+    bandpass (or low-pass) filter.
+
+    The delay of filter is compensated, so the result has the same
+    length and phase as signal.
+
+    Parameters
+    ----------
+    xdata: array_like
+        Signal values.
+    sample_rate: float
+        Sampling frequency (Hz).
+    band: tuple of 2 floats
+        Bounds of bandpass (Hz). Low-pass filter if the first bound
+        is 0.
+    ntaps: int
+        Length of FIR filter (must be odd).
+    nfft: int
+        Length of FFT used for blocks (see BlockFilter).
+    axis: int
+        Axis of time (default is -1).
+    chunk_len: int
+        Length of chunks passed to filter (in samples). If None, the
+        whole signal is passed at once.
+
+    Returns
+    -------
+    : np.array
+        Filtered signal.
+    """
+    x_moved = np.moveaxis(np.asarray(xdata), axis, -1)
+    x_len = x_moved.shape[-1]
+    if not chunk_len:
+        chunk_len = max(x_len, 1)
+
+    filt = BlockFilter(sample_rate, band, ntaps, nfft)
+    out = np.empty(x_moved.shape)
+
+    chunks = [x_moved[..., start:start + chunk_len]
+              for start in range(0, x_len, chunk_len)]
+    chunks.append(np.zeros(x_moved.shape[:-1] + (filt.delay, )))
 
+    pos = -filt.delay
+    for chunk in chunks:
+        ydata = filt(chunk)
+        stop = pos + ydata.shape[-1]
+        if stop > 0:
+            first = max(-pos, 0)
+            out[..., pos + first:stop] = ydata[..., first:]
+        pos = stop
 
-def butter_filter(xdata, sample_rate, freqs, order, btype='band'):
+    return np.moveaxis(out, -1, axis)
+
+
+class BlockFilter:
+    """FIR filter approximating ideal bandpass (or low-pass) filter
+    applied to chunks of signal by overlap-save method.
+
+    Chunks can have any length, the end of previous chunk is kept
+    between calls. Each chunk is filtered by blocks of nfft samples
+    with FFT, spectra are calculated for BATCH_SIZE blocks at once, so
+    the extra memory does not depend on the length of chunk.
+    Filter is causal, the result is delayed by delay samples.
+
+    Parameters
+    ----------
+    sample_rate: float
+        Sampling frequency (Hz).
+    band: tuple of 2 floats
+        Bounds of bandpass (Hz). Low-pass filter if the first bound
+        is 0.
+    ntaps: int
+        Length of FIR filter (must be odd).
+    nfft: int
+        Length of FFT. If not set, the power of 2 not less than
+        4*ntaps is used.
+    """
+
+    def __init__(self, sample_rate, band, ntaps=255, nfft=None):
+        if ntaps % 2 == 0:
+            raise ValueError('ntaps of block filter must be odd.')
+
+        if not nfft:
+            nfft = 1 << (4 * ntaps - 1).bit_length()
+        if nfft < ntaps:
+            raise ValueError('nfft of block filter must be not less '
+                             'than ntaps.')
+
+        self.ntaps = ntaps
+        self.nfft = nfft
+        self.delay = ntaps // 2
+
+        band = (float(band[0]), float(band[1]))
+        self.taps, self._fr_resp = _ideal_fir(sample_rate, band, ntaps, nfft)
+        self._step = nfft - ntaps + 1
+        self._history = None
+
+    def reset(self):
+        """Forget the kept end of signal."""
+        self._history = None
+
+    def __call__(self, xdata):
+        """Filter chunk of signal.
+
+        Parameters
+        ----------
+        xdata: array_like
+            Chunk of signal. Time is the last axis, the other axes
+            (channels) must be the same for all chunks.
+
+        Returns
+        -------
+        : np.array
+            Filtered chunk (the same length).
+        """
+        xdata = np.asarray(xdata)
+        x_len = xdata.shape[-1]
+        hist_len = self.ntaps - 1
+
+        if self._history is None:
+            self._history = np.zeros(xdata.shape[:-1] + (hist_len, ))
+
+        blocks_total = -(-x_len // self._step)
+        buf = np.zeros(xdata.shape[:-1]
+                       + ((blocks_total - 1) * self._step + self.nfft, ))
+        buf[..., :hist_len] = self._history
+        buf[..., hist_len:hist_len + x_len] = xdata
+        self._history = buf[..., x_len:x_len + hist_len].copy()
+
+        if x_len == 0:
+            return np.zeros(xdata.shape)
+
+        blocks = sliding_window_view(buf, self.nfft, axis=-1)[
+            ..., ::self._step, :]
+        ydata = np.empty(xdata.shape[:-1] + (blocks_total * self._step, ))
+        for start in range(0, blocks_total, BATCH_SIZE):
+            batch = blocks[..., start:start + BATCH_SIZE, :]
+            spectrum = np.fft.rfft(batch, self.nfft) * self._fr_resp
+            res = np.fft.irfft(spectrum, self.nfft)[..., hist_len:]
+            ydata[..., start * self._step:
+                  (start + batch.shape[-2]) * self._step] = \
+                res.reshape(xdata.shape[:-1] + (-1, ))
+
+        return ydata[..., :x_len]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _ideal_fir(sample_rate, band, ntaps, nfft):
+    """Return taps and frequency response (for rfft of nfft length) of
+    FIR filter designed by sampling of ideal frequency response."""
+    freqs = abs(np.fft.fftfreq(ntaps, 1 / sample_rate))
+    ideal = np.zeros(ntaps)
+    ideal[(freqs >= band[0]) & (freqs <= band[1])] = 1
+
+    taps = np.roll(np.real(np.fft.ifft(ideal)), ntaps // 2)
+    taps *= sig.get_window('hamming', ntaps, fftbins=False)
+    fr_resp = np.fft.rfft(taps, nfft)
+
+    taps.flags.writeable = False
+    fr_resp.flags.writeable = False
+
+    return taps, fr_resp
+
+
+def butter_filter(xdata, sample_rate, freqs, order, btype='band', axis=-1,
+                  out=None, chunk_len=None, zero_phase=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Butterworth filter.
 
+    Filter is applied as cascade of second-order sections, so it is
+    stable for high orders too. Design of filter is cached.
+
     Parameters
     ----------
     xdata: array_like
@@ -105,54 +315,184 @@ def butter_filter(xdata, sample_rate, freqs, order, btype='band'):
         Order of filter.
     btype: str ('band' | 'lowpass')
         Type of filter.
+    axis: int
+        Axis of time (default is -1).
+    out: np.ndarray
+        Array for result (for example, writable np.memmap). If set,
+        the signal is filtered by chunks.
+    chunk_len: int
+        Length of chunk (in samples). If set, the signal is filtered
+        by chunks, filter state is passed between them. Default
+        length is CHUNK_LEN if out is set.
+    zero_phase: bool
+        If True, the signal is filtered forward and backward, so the
+        result has no phase shift (can not be done by chunks).
 
     Returns
     -------
     : np.array
         filtered signal.
     """
+    sos = butter_sos(sample_rate, freqs, order, btype)
+
+    if zero_phase:
+        if out is not None or chunk_len is not None:
+            raise ValueError('Zero-phase filtration can not be done by '
+                             'chunks.')
+        return sig.sosfiltfilt(sos, xdata, axis=axis)
+
+    if out is None and chunk_len is None:
+        return sig.sosfilt(sos, xdata, axis=axis)
+
+    if not chunk_len:
+        chunk_len = CHUNK_LEN
+
+    x_moved = np.moveaxis(np.asarray(xdata), axis, -1)
+    if out is None:
+        out = np.empty(np.shape(xdata), dtype=np.result_type(sos, xdata))
+    out_moved = np.moveaxis(out, axis, -1)
+
+    filt = ButterFilter(sample_rate, freqs, order, btype)
+    for start in range(0, x_moved.shape[-1], chunk_len):
+        chunk = x_moved[..., start:start + chunk_len]
+        out_moved[..., start:start + chunk_len] = filt(chunk)
+
+    return out
+
+
+class ButterFilter:
+    """Butterworth filter applied to chunks of signal.
+
+    The state of filter is passed between chunks, so the result for
+    the stream of chunks is the same as the result of butter_filter()
+    for the whole signal.
+
+    Parameters
+    ----------
+    sample_rate: float
+        Sampling frequency (Hz).
+    freqs: array_like
+        One or two frequencies.
+    order: integer
+        Order of filter.
+    btype: str ('band' | 'lowpass')
+        Type of filter.
+    """
+
+    def __init__(self, sample_rate, freqs, order, btype='band'):
+        self.sos = butter_sos(sample_rate, freqs, order, btype)
+        self._zi = None
+
+    def reset(self):
+        """Reset the state of filter."""
+        self._zi = None
+
+    def __call__(self, xdata):
+        """Filter chunk of signal.
+
+        Parameters
+        ----------
+        xdata: array_like
+            Chunk of signal. Time is the last axis, the other axes
+            (channels) must be the same for all chunks.
+
+        Returns
+        -------
+        : np.array
+            Filtered chunk.
+        """
+        xdata = np.asarray(xdata)
+        if self._zi is None:
+            self._zi = np.zeros((len(self.sos), ) + xdata.shape[:-1] + (2, ))
+
+        ydata, self._zi = sig.sosfilt(self.sos, xdata, zi=self._zi)
+
+        return ydata
+
+
+def butter_sos(sample_rate, freqs, order, btype='band'):
+    """Return second-order sections of Butterworth filter.
+
+    Design of filter is cached by order, normalized frequencies and
+    type of filter.
+
+    Parameters
+    ----------
+    sample_rate: float
+        Sampling frequency (Hz).
+    freqs: array_like
+        One or two frequencies.
+    order: integer
+        Order of filter.
+    btype: str ('band' | 'lowpass')
+        Type of filter.
+
+    Returns
+    -------
+    : np.ndarray
+        Second-order sections.
+    """
     nyq = 0.5 * sample_rate
-    freqs = np.array(freqs)
-    freqs /= nyq
-    b_coeffs, a_coeffs = sig.butter(order, freqs, btype=btype)
+    wn = tuple(float(freq) / nyq for freq in np.atleast_1d(freqs))
 
-    return sig.lfilter(b_coeffs, a_coeffs, xdata)
+    return _butter_design(order, wn, btype).copy()
 
 
-def find_butt_bandpass_order(band, sample_rate):
+@lru_cache(maxsize=CACHE_SIZE)
+def _butter_design(order, wn, btype):
+    """Return second-order sections of Butterworth filter."""
+    if len(wn) == 1:
+        wn = wn[0]
+
+    sos = sig.butter(order, wn, btype=btype, output='sos')
+    sos.flags.writeable = False
+
+    return sos
+
+
+def find_butt_bandpass_order(band, sample_rate, freqs_num=ORDER_FREQS_NUM):
     """Calculate the order of Butterworth bandpass filter using minimization of
     metric between ideal and real frequency response.
 
+    Frequency responses are calculated on the grid of freqs_num
+    frequencies from 0 to Nyquist frequency. Results are cached by
+    band, sample rate and freqs_num.
+
     Parameters
     ----------
     band: array_like
         Pair of frequencies. Bounds of bandpass (Hz).
     sample_rate: float
         Sample rate (Hz).
+    freqs_num: int
+        Number of frequencies in grid.
 
     Returns
     -------
     : integer
         Order of filter.
     """
-    spectrum_len = round(60 * 120 * sample_rate)
-    unit_pulse = np.zeros(spectrum_len)
-    unit_pulse[1] = 1
-    ideal_fr = np.zeros(spectrum_len)
-    freqs = np.fft.fftfreq(spectrum_len, 1 / sample_rate)
+    return _butt_bandpass_order((float(band[0]), float(band[1])),
+                                float(sample_rate), freqs_num)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _butt_bandpass_order(band, sample_rate, freqs_num):
+    """Calculate the order of Butterworth bandpass filter."""
+    max_len = round(60 * 120 * sample_rate)
+    freqs = np.arange(freqs_num) * (0.5 * sample_rate / freqs_num)
+    ideal_fr = np.zeros(freqs_num)
     ideal_fr[(freqs >= band[0]) & (freqs <= band[1])] = 1
-    ideal_fr = ideal_fr[:spectrum_len // 2]
+    wn = np.array(band) / (0.5 * sample_rate)
     prev_metric = np.inf
 
     for order in range(3, 21):
-        impulse_response = butter_filter(unit_pulse,
-                                         sample_rate,
-                                         band,
-                                         order,
-                                         btype='band')
-
-        real_fr = abs(fft(impulse_response))[:spectrum_len // 2]
-        metric = np.sum((real_fr - ideal_fr)**2)**0.5
+        b_coeffs, a_coeffs = sig.butter(order, wn, btype='band')
+        impulse_response = _impulse_response(b_coeffs, a_coeffs, max_len)
+
+        with np.errstate(over='ignore', invalid='ignore'):
+            real_fr = abs(_dtft(impulse_response, freqs_num))
+            metric = np.sum((real_fr - ideal_fr)**2)**0.5
         best_order = order
 
         if (np.isnan(metric)) or (metric >= prev_metric):
@@ -165,6 +505,52 @@ def find_butt_bandpass_order(band, sample_rate):
     return best_order - 1
 
 
+def _impulse_response(b_coeffs, a_coeffs, max_len, chunk_len=4096,
+                      tol=1e-13):
+    """Return impulse response of IIR filter.
+
+    Response is calculated by chunks until it decays (or grows to
+    infinity) or its length reaches max_len.
+    """
+    zi = np.zeros(max(len(a_coeffs), len(b_coeffs)) - 1)
+    xdata = np.zeros(min(chunk_len, max_len))
+    xdata[0] = 1
+
+    chunks = []
+    resp_len = 0
+    peak = 0
+    while resp_len < max_len:
+        chunk, zi = sig.lfilter(b_coeffs, a_coeffs,
+                                xdata[:max_len - resp_len], zi=zi)
+        chunks.append(chunk)
+        resp_len += len(chunk)
+
+        chunk_peak = np.max(abs(chunk))
+        if not np.isfinite(chunk_peak):
+            break
+        peak = max(peak, chunk_peak)
+        if chunk_peak <= tol * peak:
+            break
+
+        xdata = np.zeros(chunk_len)
+
+    return np.concatenate(chunks)
+
+
+def _dtft(xdata, freqs_num):
+    """Return DTFT of signal on grid of freqs_num frequencies from 0 to
+    Nyquist frequency.
+
+    Signal is folded to the length of 2*freqs_num, so one short FFT is
+    enough for signal of any length.
+    """
+    period = 2 * freqs_num
+    folded = np.zeros(-(-len(xdata) // period) * period)
+    folded[:len(xdata)] = xdata
+
+    return np.fft.rfft(folded.reshape(-1, period).sum(axis=0))[:freqs_num]
+
+
 def haar_one_step(xdata, tdata, denominator=2):
     """One cascade of Haar transform.
 
@@ -186,17 +572,16 @@ def haar_one_step(xdata, tdata, denominator=2):
     : np.array.
         Decimated time values
     """
-    scl = []
-    det = []
-    res_ts = []
-
-    for x_left, x_right in zip(xdata[::2], xdata[1::2]):
-        scl.append((x_left + x_right) / denominator)
-        det.append((x_left - x_right) / denominator)
+    xdata = np.asarray(xdata)
+    half = len(xdata) // 2
+    x_left = xdata[0:2 * half:2]
+    x_right = xdata[1:2 * half:2]
 
-    res_ts = tdata[1::2]
+    scl = (x_left + x_right) / denominator
+    det = (x_left - x_right) / denominator
+    res_ts = np.array(tdata[1::2])
 
-    return np.array(scl), np.array(det), np.array(res_ts)
+    return scl, det, res_ts
 
 
 def haar_scaling(xdata, tdata, steps_number):
@@ -218,31 +603,147 @@ def haar_scaling(xdata, tdata, steps_number):
     : np.array
         Decimated time values.
     """
-    res_xs = xdata.copy()
-    res_ts = tdata.copy()
-    i = 0
+    res_xs = np.array(xdata)
+    res_ts = np.array(tdata)
+
+    for _ in range(steps_number):
+        half = len(res_xs) // 2
+        res_xs = (res_xs[0:2 * half:2] + res_xs[1:2 * half:2]) / 2
+        res_ts = res_ts[1::2]
 
-    while i < steps_number:
-        res = haar_one_step(res_xs, res_ts, denominator=2)
-        res_xs, res_ts = res[0], res[2]
-        i += 1
+    return res_xs, res_ts.copy()
 
-    return res_xs, res_ts
 
+def haar_decompose(xdata, levels, denominator=2, inplace=False):
+    """Multilevel Haar transform.
 
-def smooth(xdata, ntaps=3, cut=True):
+    Parameters
+    ----------
+    xdata: array_like
+        Signal values.
+    levels: integer
+        Number of cascades.
+    denominator: integer
+        Denominator used in Haar transform (default is 2).
+    inplace: bool
+        If True, xdata (array of floats with length multiple of
+        2**levels) is overwritten by the result of transform, so no
+        memory is allocated. Scaled values and details are placed
+        interleaved: scaled values are xdata[::2**levels], details of
+        level k are xdata[2**(k-1)::2**k]. Values can differ from the
+        result of usual mode in last bits.
+
+    Returns
+    -------
+    : np.array
+        Scaled signal values.
+    : np.array
+        Details of all levels in one flat buffer: details of level 1,
+        then details of level 2 and so on (xdata in in-place mode).
+    : list of np.array
+        Details of levels (views of buffer), level 1 is the first.
+    """
+    if inplace:
+        return _haar_decompose_inplace(xdata, levels, denominator)
+
+    xdata = np.asarray(xdata)
+    lens = [len(xdata) >> level for level in range(1, levels + 1)]
+    details = np.empty(sum(lens), dtype=np.result_type(xdata, float))
+
+    levels_det = []
+    start = 0
+    scl = xdata
+    for half in lens:
+        det = details[start:start + half]
+        x_left = scl[0:2 * half:2]
+        x_right = scl[1:2 * half:2]
+        np.subtract(x_left, x_right, out=det)
+        det /= denominator
+        scl = (x_left + x_right) / denominator
+        levels_det.append(det)
+        start += half
+
+    return np.array(scl, dtype=details.dtype), details, levels_det
+
+
+def _haar_decompose_inplace(xdata, levels, denominator):
+    """Multilevel Haar transform overwriting xdata."""
+    if len(xdata) % (1 << levels):
+        raise ValueError('Length of signal must be multiple of 2**levels '
+                         'for in-place Haar transform.')
+
+    levels_det = []
+    for level in range(1, levels + 1):
+        step = 1 << level
+        scl = xdata[0::step]
+        det = xdata[step // 2::step]
+        np.subtract(scl, det, out=det)
+        det /= denominator
+        scl *= 2 / denominator
+        scl -= det
+        levels_det.append(det)
+
+    return xdata[0::1 << levels], xdata, levels_det
+
+
+def haar_reconstruct(scl, levels_det, denominator=2, out=None):
+    """Inverse multilevel Haar transform.
+
+    Parameters
+    ----------
+    scl: array_like
+        Scaled signal values.
+    levels_det: list of array_like
+        Details of levels, level 1 is the first (see
+        haar_decompose()).
+    denominator: integer
+        Denominator used in Haar transform (default is 2).
+    out: np.ndarray
+        Array for result (length is len(scl) * 2**len(levels_det)).
+        It can be the buffer of in-place haar_decompose(), then
+        details are not copied.
+
+    Returns
+    -------
+    : np.array
+        Signal values.
+    """
+    levels = len(levels_det)
+    if out is None:
+        out = np.empty(len(scl) << levels,
+                       dtype=np.result_type(scl, *levels_det, float))
+
+    out[0::1 << levels] = scl
+    for level in range(levels, 0, -1):
+        step = 1 << level
+        x_left = out[0::step]
+        x_right = out[step // 2::step]
+        if not np.shares_memory(x_right, levels_det[level - 1]):
+            x_right[...] = levels_det[level - 1]
+        x_left += x_right
+        x_right *= -2
+        x_right += x_left
+        x_left *= denominator / 2
+        x_right *= denominator / 2
+
+    return out
+
+
+def smooth(xdata, ntaps=3, cut=True, axis=-1):
     """Smooth signal with Hamming window."""
     wind = np.hamming(ntaps)
     wind = wind / sum(wind)
 
-    res = sig.lfilter(wind, [1], xdata)
+    res = sig.lfilter(wind, [1], xdata, axis=axis)
     if cut:
-        res = res[ntaps:]
+        index = [slice(None)] * res.ndim
+        index[axis] = slice(ntaps, None)
+        res = res[tuple(index)]
 
     return res
 
 
-def trend_smooth(xdata, sample_rate=1, tdata=None, cut_off=0.5):
+def trend_smooth(xdata, sample_rate=1, tdata=None, cut_off=0.5, axis=-1):
     """Calculate trend of signal using smoothing filter.
 
     Parameters
@@ -253,6 +754,8 @@ def trend_smooth(xdata, sample_rate=1, tdata=None, cut_off=0.5):
         Time values.
     cut_off: float
         The frequencies lower than this are trend's frequencies.
+    axis: int
+        Axis of time (default is -1).
 
     Returns
     -------
@@ -261,10 +764,10 @@ def trend_smooth(xdata, sample_rate=1, tdata=None, cut_off=0.5):
     : np.array
         Time values.
     """
-    x_len = len(xdata)
+    x_len = np.shape(xdata)[axis]
 
     if tdata is None:
-        tdata = np.linspace(0, (x_len - 1) * sample_rate, x_len)
+        tdata = np.arange(x_len) / sample_rate
     else:
         sample_rate = 1.0 / (tdata[1] - tdata[0])
 
@@ -272,7 +775,130 @@ def trend_smooth(xdata, sample_rate=1, tdata=None, cut_off=0.5):
     if win_len >= x_len:
         return None
 
-    trend_xs = smooth(xdata, win_len)
+    trend_xs = smooth(xdata, win_len, axis=axis)
     trend_ts = tdata[win_len:].copy()
 
     return trend_xs, trend_ts
+
+
+class Smoother:
+    """Smoothing of signal coming by chunks.
+
+    The state of filter is passed between chunks, so the result for
+    the stream of chunks is the same as the result of smooth() for the
+    whole signal.
+
+    Parameters
+    ----------
+    ntaps: int
+        Length of Hamming window.
+    cut: bool
+        If True, the first ntaps values of result are dropped (like in
+        smooth()).
+    """
+
+    def __init__(self, ntaps=3, cut=True):
+        wind = np.hamming(ntaps)
+        self.wind = wind / sum(wind)
+        self.ntaps = ntaps
+        self.cut = cut
+        self.reset()
+
+    def reset(self):
+        """Reset the state of filter."""
+        self._zi = None
+        self._skip = self.ntaps if self.cut else 0
+
+    def __call__(self, xdata):
+        """Smooth chunk of signal.
+
+        Parameters
+        ----------
+        xdata: array_like
+            Chunk of signal. Time is the last axis, the other axes
+            (channels) must be the same for all chunks.
+
+        Returns
+        -------
+        : np.array
+            Smoothed chunk. It is shorter than chunk while the first
+            ntaps values are dropped.
+        """
+        xdata = np.asarray(xdata)
+        if self._zi is None:
+            self._zi = np.zeros(xdata.shape[:-1] + (self.ntaps - 1, ))
+
+        res, self._zi = sig.lfilter(self.wind, [1], xdata, zi=self._zi)
+
+        return res[..., self._skipped(res.shape[-1]):]
+
+    def _skipped(self, length):
+        """Return the number of values to drop from the result."""
+        skipped = min(self._skip, length)
+        self._skip -= skipped
+
+        return skipped
+
+
+class TrendTracker:
+    """Trend of signal coming by chunks.
+
+    The result for the stream of chunks is the same as the result of
+    trend_smooth() for the whole signal.
+
+    Parameters
+    ----------
+    sample_rate: float
+        Sampling frequency (Hz).
+    cut_off: float
+        The frequencies lower than this are trend's frequencies.
+    t_start: float
+        Time of the first sample (used if time values of chunks are
+        not set).
+    """
+
+    def __init__(self, sample_rate=1, cut_off=0.5, t_start=0):
+        self.sample_rate = sample_rate
+        self.t_start = t_start
+        self.win_len = int(sample_rate / 2 / cut_off)
+        self._smoother = Smoother(self.win_len)
+        self._samples = 0
+
+    def reset(self):
+        """Reset the state of tracker."""
+        self._smoother.reset()
+        self._samples = 0
+
+    def __call__(self, xdata, tdata=None):
+        """Calculate trend for chunk of signal.
+
+        Parameters
+        ----------
+        xdata: array_like
+            Chunk of signal. Time is the last axis.
+        tdata: array_like
+            Time values of chunk. If not set, the time is calculated
+            from t_start and sample rate.
+
+        Returns
+        -------
+        : np.array
+            Trend values. Empty while the first win_len samples are
+            accumulated.
+        : np.array
+            Time values.
+        """
+        xdata = np.asarray(xdata)
+        x_len = xdata.shape[-1]
+
+        trend_xs = self._smoother(xdata)
+        first = x_len - trend_xs.shape[-1]
+
+        if tdata is None:
+            trend_ts = self.t_start + (
+                self._samples + np.arange(first, x_len)) / self.sample_rate
+        else:
+            trend_ts = np.array(tdata[first:])
+        self._samples += x_len
+
+        return trend_xs, trend_ts
@@ -16,12 +16,13 @@
 """This module implements the base class for online filters."""
 
 from math import pi
-from collections import deque
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from dsplab.flow.activity import Activity
 
 PI = pi
 PI2 = 2 * PI
+NUMBERS = (int, float)
 
 
 def unwrap_point(phi):
@@ -35,6 +36,203 @@ def unwrap_point(phi):
     return phi
 
 
+class RingBuffer:
+    """Queue of fixed length on preallocated NumPy array.
+
+    Every sample is written twice to the buffer of double length, so
+    the samples of queue are always available as contiguous array
+    (view of buffer, no copy). Samples are ordered from the oldest to
+    the newest like in deque.
+
+    Parameters
+    ----------
+    length: int
+        Length of queue.
+    fill_with: object
+        Initial value of every element of queue.
+    dtype: np.dtype
+        Type of samples. If not set, the type is inferred from
+        fill_with and samples: the shape of elements is taken from the
+        first sample, the type is extended if sample does not fit (for
+        example, complex sample in float queue), samples which are not
+        numbers or arrays of the same shape are kept as objects.
+    """
+
+    def __init__(self, length, fill_with=0, dtype=None):
+        self.length = length
+        self._fill_with = fill_with
+        self._fixed = dtype is not None
+        self._fresh = True
+        self._numbers = False
+        if dtype is None:
+            dtype = _promote(np.asarray(fill_with).dtype, np.dtype(float))
+
+        self._data = _filled((2 * length, ) + np.shape(fill_with), dtype,
+                             fill_with)
+        self._pos = 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        res = self.values[index]
+        if isinstance(res, np.ndarray):
+            return res.copy()
+
+        return res
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        res = self.values
+        if dtype is not None:
+            res = res.astype(dtype)
+        elif copy:
+            res = res.copy()
+
+        return res
+
+    @property
+    def values(self):
+        """Samples of queue (read-only view of buffer)."""
+        res = self._data[self._pos:self._pos + self.length]
+        res.flags.writeable = False
+
+        return res
+
+    def append(self, sample):
+        """Add sample to queue removing the oldest one."""
+        if not (self._fixed or self._numbers and isinstance(sample, NUMBERS)):
+            sample = self._fit(sample)
+
+        self._data[self._pos] = sample
+        self._data[self._pos + self.length] = sample
+        self._pos += 1
+        if self._pos == self.length:
+            self._pos = 0
+
+    def _fit(self, sample, block=False):
+        """Change buffer (if needed) so that the sample (or block of
+        samples) can be stored without loss."""
+        data = self._data
+        if data.dtype == object:
+            self._fixed = True
+            return sample
+
+        values = np.asarray(sample)
+        shape = values.shape[1:] if block else values.shape
+        if shape != data.shape[1:]:
+            if self._fresh and _fills(self._fill_with, shape):
+                data = _filled((len(data), ) + shape, data.dtype,
+                               self._fill_with)
+            else:
+                data = _objects(data)
+        if not np.can_cast(values.dtype, data.dtype, 'same_kind'):
+            dtype = _promote(values.dtype, data.dtype)
+            data = _objects(data) if dtype == object else data.astype(dtype)
+
+        self._data = data
+        self._fresh = False
+        self._numbers = data.ndim == 1 and data.dtype.kind in 'fc'
+        self._fixed = data.dtype == object
+
+        if data.dtype == object:
+            return sample
+
+        return values
+
+    def extend(self, samples):
+        """Add samples to queue (the same as append() in loop)."""
+        if not self._fixed:
+            samples = self._fit(samples, block=True)
+        samples = np.asarray(samples)
+        if self._data.dtype == object and self._data.ndim == 1 and \
+           samples.ndim > 1:
+            for sample in samples:
+                self.append(sample)
+            return
+
+        if len(samples) >= self.length:
+            samples = samples[len(samples) - self.length:]
+
+        num = len(samples)
+        first = min(num, self.length - self._pos)
+        for start in (self._pos, self._pos + self.length):
+            self._data[start:start + first] = samples[:first]
+        for start in (0, self.length):
+            self._data[start:start + num - first] = samples[first:]
+
+        self._pos = (self._pos + num) % self.length
+
+    def windows(self, samples):
+        """Return states of queue after adding of every sample.
+
+        Parameters
+        ----------
+        samples: array_like
+            New samples.
+
+        Returns
+        -------
+        : np.ndarray
+            Read-only array, i-th element is the queue after adding of
+            samples[:i + 1] (view of temporary buffer, no copy per
+            window).
+        """
+        if not self._fixed:
+            samples = self._fit(samples, block=True)
+
+        buf = np.empty((self.length + len(samples), ) + self._data.shape[1:],
+                       dtype=self._data.dtype)
+        buf[:self.length] = self.values
+        if buf.dtype == object and buf.ndim == 1:
+            for i, sample in enumerate(samples):
+                buf[self.length + i] = sample
+        else:
+            buf[self.length:] = samples
+        res = sliding_window_view(buf, self.length, axis=0)[1:]
+
+        return np.moveaxis(res, -1, 1)
+
+
+def _promote(dtype, other):
+    """Return type for values of both types (object for non-numeric)."""
+    if dtype.kind in 'biufc' and other.kind in 'biufc':
+        return np.result_type(dtype, other)
+
+    return np.dtype(object)
+
+
+def _fills(fill_with, shape):
+    """Check if value can fill element of given shape."""
+    try:
+        return np.broadcast_shapes(np.shape(fill_with), shape) == shape
+    except ValueError:
+        return False
+
+
+def _filled(shape, dtype, fill_with):
+    """Return array filled with value."""
+    res = np.empty(shape, dtype=dtype)
+    if dtype == object and np.ndim(fill_with) > 0:
+        res = np.empty(shape[:1], dtype=dtype)
+        res.fill(fill_with)
+    else:
+        res[...] = fill_with
+
+    return res
+
+
+def _objects(data):
+    """Return copy of buffer with elements as objects (one per sample)."""
+    res = np.empty(len(data), dtype=object)
+    for i, value in enumerate(data):
+        res[i] = value if np.ndim(value) else value.item()
+
+    return res
+
+
 class QueueFilter(Activity):
     """Online filter with queue.
 
@@ -44,11 +242,20 @@ class QueueFilter(Activity):
         Lenght of filter.
     fill_with: object
         Initial value of every element of queue.
+    dtype: np.dtype
+        Type of samples (see RingBuffer).
+
+    Notes
+    -----
+    Queue is RingBuffer, its samples are available as array without
+    copying (queue.values), so proc_queue() can be vectorized. If
+    proc_windows() is implemented, process_block() handles all the
+    samples of block in one call.
     """
 
-    def __init__(self, ntaps, fill_with=0):
+    def __init__(self, ntaps, fill_with=0, dtype=None):
         super().__init__()
-        self.queue = deque([fill_with] * ntaps, maxlen=ntaps)
+        self.queue = RingBuffer(ntaps, fill_with, dtype)
         self.ntaps = ntaps
 
     def __call__(self, *args, **kwargs):
@@ -60,10 +267,50 @@ class QueueFilter(Activity):
 
         return self.proc_queue()
 
+    def process_block(self, samples):
+        """Add samples to queue and return output values.
+
+        Parameters
+        ----------
+        samples: array_like
+            Input samples.
+
+        Returns
+        -------
+        : np.ndarray
+            Output values (one per sample), the same as returned by
+            __call__() in loop.
+        """
+        samples = np.asarray(samples)
+        try:
+            res = self.proc_windows(self.queue.windows(samples))
+        except NotImplementedError:
+            return np.array([self(sample) for sample in samples])
+
+        self.queue.extend(samples)
+
+        return np.asarray(res)
+
     def proc_queue(self):
         """Process queue."""
         raise NotImplementedError
 
+    def proc_windows(self, windows):
+        """Process many states of queue (vectorized proc_queue()).
+
+        Parameters
+        ----------
+        windows: np.ndarray
+            States of queue, the first axis is the number of state
+            (see RingBuffer.windows()).
+
+        Returns
+        -------
+        : array_like
+            Output values, one per state of queue.
+        """
+        raise NotImplementedError
+
 
 class Delayer(QueueFilter):
     # pylint: disable=too-few-public-methods
@@ -72,10 +319,25 @@ class Delayer(QueueFilter):
     def proc_queue(self):
         return self.queue[0]
 
+    def proc_windows(self, windows):
+        return windows[:, 0]
+
 
 class And(Activity):
     # pylint: disable=too-few-public-methods
-    """And operation."""
+    """And operation (product of values).
+
+    Parameters
+    ----------
+    axis: int
+        Axis of inputs in sample. Default is 0, so for the list of
+        inputs every input may be array (values of channels or block
+        of samples).
+    """
+
+    def __init__(self, axis=0):
+        super().__init__()
+        self.axis = axis
 
     def __call__(self, *args, **kwargs):
         """Do operation.
@@ -83,35 +345,216 @@ class And(Activity):
         Parameters
         ----------
         sample: array_like of floats
-            Input values.
+            Input values. Inputs may be passed as separate arguments
+            too (WorkNode with several inputs).
+
+        Returns
+        -------
+        : float or np.ndarray
+            Result of operation.
         """
         return self.__call(*args, **kwargs)
 
-    def __call(self, sample):
-        res = 1
-        for value in sample:
-            res *= value
+    def __call(self, sample, *others):
+        sample = _stack_inputs(sample, others, self.axis)
 
-        return res
+        return np.prod(sample, axis=self.axis)
 
 
 class Or(Activity):
     # pylint: disable=too-few-public-methods
-    """Or operation."""
+    """Or operation (probabilistic sum of values).
+
+    Parameters
+    ----------
+    axis: int
+        Axis of inputs in sample (see And).
+    """
+
+    def __init__(self, axis=0):
+        super().__init__()
+        self.axis = axis
 
     def __call__(self, *args, **kwargs):
         """Do operation.
+
         Parameters
         ----------
         sample: array_like of floats
-            Input values.
+            Input values. Inputs may be passed as separate arguments
+            too (WorkNode with several inputs).
+
+        Returns
+        -------
+        : float or np.ndarray
+            Result of operation.
+        """
+        return self.__call(*args, **kwargs)
+
+    def __call(self, sample, *others):
+        sample = _stack_inputs(sample, others, self.axis)
+
+        return 1 - np.prod(np.subtract(1, sample), axis=self.axis)
+
+
+def _stack_inputs(sample, others, axis):
+    """Return inputs as one array (inputs are broadcast, so scalar
+    inputs may be mixed with vectors)."""
+    if others:
+        sample = (sample, ) + others
+
+    if isinstance(sample, np.ndarray):
+        return sample
+
+    return np.stack(np.broadcast_arrays(*sample), axis=axis)
+
+
+class Not(Activity):
+    # pylint: disable=too-few-public-methods
+    """Not operation."""
+
+    def __call__(self, *args, **kwargs):
+        """Do operation.
+
+        Parameters
+        ----------
+        sample: float or array_like of floats
+            Input value (values of channels or block of samples).
+
+        Returns
+        -------
+        : float or np.ndarray
+            Result of operation.
+        """
+        return self.__call(*args, **kwargs)
+
+    @staticmethod
+    def __call(sample):
+        return np.subtract(1, sample)
+
+
+class Threshold(Activity):
+    # pylint: disable=too-few-public-methods
+    """Comparison with threshold.
+
+    Parameters
+    ----------
+    level: float or array_like
+        Threshold (may be set for every channel).
+    above: bool
+        If True (default) the result is 1 for values greater than
+        level, if False - for values less than level.
+    """
+
+    def __init__(self, level, above=True):
+        super().__init__()
+        self.level = np.asarray(level)
+        self.above = above
+
+    def __call__(self, *args, **kwargs):
+        """Compare sample with threshold.
+
+        Parameters
+        ----------
+        sample: float or array_like of floats
+            Input value (values of channels or block of samples).
+
+        Returns
+        -------
+        : float or np.ndarray
+            1.0 if condition is true, 0.0 otherwise.
         """
         return self.__call(*args, **kwargs)
 
     def __call(self, sample):
-        res = 0
-        for value in sample:
-            res += value * (1 - res)
+        if self.above:
+            res = np.greater(sample, self.level)
+        else:
+            res = np.less(sample, self.level)
+
+        return res.astype(float)
+
+
+class Hysteresis(Activity):
+    """Comparison with two thresholds (Schmitt trigger).
+
+    The output becomes 1 when the value is greater than high and
+    becomes 0 when the value is less than low, between thresholds the
+    previous output is kept. The state is kept for every channel.
+
+    Parameters
+    ----------
+    low: float or array_like
+        Lower threshold.
+    high: float or array_like
+        Upper threshold.
+    init: float or array_like
+        Initial state.
+    """
+
+    def __init__(self, low, high, init=0):
+        super().__init__()
+        self.low = np.asarray(low)
+        self.high = np.asarray(high)
+        if np.any(self.low > self.high):
+            raise ValueError('Lower threshold is greater than upper one')
+
+        self.init = init
+        self.state = None
+        self.reset()
+
+    def reset(self):
+        """Reset state."""
+        self.state = np.asarray(self.init, dtype=float)
+
+    def __call__(self, *args, **kwargs):
+        """Add sample.
+
+        Parameters
+        ----------
+        sample: float or array_like of floats
+            Input value (values of channels).
+
+        Returns
+        -------
+        : float or np.ndarray
+            Output value (values of channels).
+        """
+        return self.__call(*args, **kwargs)
+
+    def __call(self, sample):
+        sample = np.asarray(sample)
+        self.state = np.where(sample > self.high, 1.0,
+                              np.where(sample < self.low, 0.0, self.state))
+
+        return self.state
+
+    def process_block(self, samples):
+        """Add samples and return output values.
+
+        Parameters
+        ----------
+        samples: array_like of floats
+            Input samples, the first axis is time.
+
+        Returns
+        -------
+        : np.ndarray
+            Output values, the same as returned by __call__() in loop.
+        """
+        samples = np.asarray(samples)
+        if len(samples) == 0:
+            return np.empty(samples.shape)
+
+        upper = samples > self.high
+        switch = upper | (samples < self.low)
+
+        times = np.arange(len(samples)).reshape((-1, ) + (1, ) *
+                                                (samples.ndim - 1))
+        last = np.maximum.accumulate(np.where(switch, times, -1), axis=0)
+        switched = np.take_along_axis(upper, np.maximum(last, 0), axis=0)
+        res = np.where(last >= 0, switched, self.state)
+        self.state = res[-1]
 
         return res
 
@@ -131,9 +574,20 @@ class OnlineFilter(Activity):
         Initial value of every element of queues.
     step: int
         Step. Must be positive.
+    dtype: np.dtype
+        Type of samples in queues (see RingBuffer).
+
+    Notes
+    -----
+    Queues are RingBuffer instances, their samples are available as
+    arrays without copying (queue.values), so proc_queue() can be
+    vectorized. Blocks of samples are processed by process_block() in
+    one call if proc_windows() (when ntaps is set) or proc_samples()
+    (otherwise) is implemented, and sample by sample if not.
     """
 
-    def __init__(self, ntaps=None, smooth_ntaps=None, fill_with=0, step=1):
+    def __init__(self, ntaps=None, smooth_ntaps=None, fill_with=0, step=1,
+                 dtype=None):
         super().__init__()
 
         self.add_sample_func = None
@@ -151,11 +605,10 @@ class OnlineFilter(Activity):
             self.add_sample_func = self.__add_sample_full
 
         if ntaps is not None:
-            self.queue = deque([fill_with] * ntaps, maxlen=ntaps)
+            self.queue = RingBuffer(ntaps, fill_with, dtype)
 
         if smooth_ntaps is not None:
-            self.smooth_queue = deque([fill_with] * smooth_ntaps,
-                                      maxlen=smooth_ntaps)
+            self.smooth_queue = RingBuffer(smooth_ntaps, fill_with, dtype)
             wind = np.hamming(smooth_ntaps)
             self.wind = wind / sum(wind)
 
@@ -178,7 +631,7 @@ class OnlineFilter(Activity):
         : object
             Output value.
         """
-        self.__call(*args, **kwargs)
+        return self.__call(*args, **kwargs)
 
     def __call(self, sample):
         return self.add_sample_func(sample)
@@ -211,7 +664,7 @@ class OnlineFilter(Activity):
             self.steps = 0
             self.smooth_queue.append(self.proc_sample(sample))
 
-            return np.dot(np.array(self.smooth_queue), self.wind)
+            return np.dot(self.smooth_queue.values, self.wind)
 
         return None
 
@@ -224,10 +677,49 @@ class OnlineFilter(Activity):
             self.steps = 0
             self.smooth_queue.append(self.proc_queue())
 
-            return np.dot(np.array(self.smooth_queue), self.wind)
+            return np.dot(self.smooth_queue.values, self.wind)
 
         return None
 
+    def process_block(self, samples):
+        """Add input samples to filter and return output values.
+
+        Parameters
+        ----------
+        samples: array_like
+            Input samples.
+
+        Returns
+        -------
+        : np.ndarray
+            Output values, the same as not None values returned by
+            __call__() in loop (with respect to step). Smoothed values
+            may differ by rounding errors only.
+        """
+        samples = np.asarray(samples)
+        first = self.step - self.steps - 1
+        try:
+            if self.ntaps is None:
+                values = self.proc_samples(samples[first::self.step])
+            else:
+                windows = self.queue.windows(samples)[first::self.step]
+                values = self.proc_windows(windows)
+        except NotImplementedError:
+            res = [self(sample) for sample in samples]
+            return np.array([value for value in res if value is not None])
+
+        values = np.asarray(values)
+        self.steps = (self.steps + len(samples)) % self.step
+        if self.ntaps is not None:
+            self.queue.extend(samples)
+        if self.smooth_ntaps is None:
+            return values
+
+        res = self.smooth_queue.windows(values)
+        self.smooth_queue.extend(values)
+
+        return np.tensordot(self.wind, res, axes=(0, 1))
+
     def proc_queue(self):
         """Process queue.
 
@@ -250,3 +742,34 @@ class OnlineFilter(Activity):
         : object
             Output value.
         """
+
+    def proc_windows(self, windows):
+        """Process many states of queue (vectorized proc_queue()).
+
+        Parameters
+        ----------
+        windows: np.ndarray
+            States of queue, the first axis is the number of state
+            (see RingBuffer.windows()).
+
+        Returns
+        -------
+        : array_like
+            Output values, one per state of queue.
+        """
+        raise NotImplementedError
+
+    def proc_samples(self, samples):
+        """Process many samples (vectorized proc_sample()).
+
+        Parameters
+        ----------
+        samples: np.ndarray
+            Input samples.
+
+        Returns
+        -------
+        : array_like
+            Output values, one per sample.
+        """
+        raise NotImplementedError
@@ -19,6 +19,9 @@ Node can be understood as the workplace for worker. Node can have inputs
 that are also nodes. Plan is the system of linked nodes.
 """
 
+from collections import deque
+from copy import copy
+from concurrent.futures import wait, FIRST_COMPLETED
 from dsplab.flow.activity import get_work_from_dict
 from dsplab.flow.activity import Activity
 from dsplab.flow.verify import check_plan
@@ -107,6 +110,10 @@ class Node(Activity):
         """Return the calculated data."""
         return self._res
 
+    def set_result(self, res):
+        """Set the calculated data."""
+        self._res = res
+
     def set_result_info(self, info):
         """Appent to info the description of the output data."""
         self._res_info = info
@@ -224,23 +231,40 @@ class PassNode(Node):
 
 
 class Plan(Activity):
+    # pylint: disable=too-many-instance-attributes
     """The plan.
 
     Plan is the system of linked nodes.
+
+    Parameters
+    ----------
+    descr: str
+        Description of plan.
+    quick: bool
+        If True, the plan is executed with no hooks.
+    executor: concurrent.futures.Executor
+        If set, the independent nodes are executed in parallel using
+        this executor. See parallel_run().
     """
 
-    def __init__(self, descr=None, quick=False):
+    def __init__(self, descr=None, quick=False, executor=None):
         super().__init__()
-        self._nodes = []
+        self._nodes = {}
         self._inputs = []
+        self._input_set = set()
         self._outputs = []
         self._progress_func = None
         self._descr = descr
 
         self._quick = None
+        self._executor = None
+        self._run_func = None
         self.set_quick(quick)
+        self.set_executor(executor)
 
-        self._sequence = []
+        self._successors = {}
+        self._pending = {}
+        self._sequence = {}
 
     def set_descr(self, descr):
         """Set description of plan."""
@@ -255,34 +279,137 @@ class Plan(Activity):
     def set_quick(self, value=True):
         """Make plan quick (for online with no hooks) or not."""
         self._quick = value
-        if not value:
-            self._run_func = self.run
-        else:
+        self._select_run_func()
+
+    def set_executor(self, executor):
+        """Set executor for parallel execution of plan.
+
+        Use None for sequential execution.
+        """
+        self._executor = executor
+        self._select_run_func()
+
+    def get_executor(self):
+        """Return executor."""
+        return self._executor
+
+    executor = property(get_executor,
+                        set_executor,
+                        doc='Executor for parallel execution of plan.')
+
+    def _select_run_func(self):
+        if self._executor is not None:
+            self._run_func = self.parallel_run
+        elif self._quick:
             self._run_func = self.quick_run
+        else:
+            self._run_func = self.run
 
     def _detect_sequence(self):
-        """Find sequence of nodes for execution."""
-        self._sequence = []
-        while True:
-            finished = True
-            for node in self._nodes:
-                if (node in self._sequence) or (node in self._inputs):
-                    continue
+        """Find sequence of nodes for execution from scratch.
 
-                if set(node.inputs) <= set(self._sequence) | set(self._inputs):
-                    self._sequence.append(node)
-                    finished = False
+        Nodes are sorted topologically with Kahn's algorithm. Inputs of
+        the plan are considered as calculated. Nodes depending on the
+        nodes which are not in the plan or belonging to cycles are not
+        included to sequence.
+        """
+        self._successors = {}
+        self._pending = {}
+        self._sequence = {}
 
-            if finished:
-                break
+        for node in self._nodes:
+            self._link(node)
+
+        ready = []
+        for node in self._nodes:
+            if node in self._input_set:
+                continue
+
+            degree = self._count_pending_inputs(node)
+            if degree:
+                self._pending[node] = degree
+            else:
+                ready.append(node)
+
+        self._schedule(ready)
+
+    def _link(self, node):
+        """Register node as successor of its inputs."""
+        for inpt in node.inputs:
+            self._successors.setdefault(inpt, {})[node] = None
+
+    def _unlink(self, node):
+        """Unregister node as successor of its inputs."""
+        for inpt in node.inputs:
+            try:
+                del self._successors[inpt][node]
+            except KeyError:
+                pass
+
+    def _is_calculated(self, node):
+        """Check if node is input of plan or is in the sequence."""
+        return (node in self._input_set) or (node in self._sequence)
+
+    def _count_pending_inputs(self, node):
+        """Return the number of inputs which are not calculated yet."""
+        total = 0
+        for inpt in set(node.inputs):
+            if not self._is_calculated(inpt):
+                total += 1
+
+        return total
+
+    def _schedule(self, nodes):
+        """Append ready nodes to sequence and then the nodes which become
+        ready after them."""
+        queue = deque(nodes)
+        while queue:
+            node = queue.popleft()
+            self._sequence[node] = None
+
+            for succ in self._successors.get(node, ()):
+                if succ not in self._pending:
+                    continue
+
+                self._pending[succ] -= 1
+                if self._pending[succ] == 0:
+                    del self._pending[succ]
+                    queue.append(succ)
 
     def add_node(self, node, inputs=None):
         """Add node to plan."""
-        self._nodes.append(node)
+        if node in self._nodes:
+            if inputs is not None:
+                node.inputs = inputs
+
+            self._detect_sequence()
+            return
+
+        self._nodes[node] = None
 
         if inputs is not None:
             node.inputs = inputs
 
+        self._link(node)
+
+        if node in self._input_set:
+            return
+
+        degree = self._count_pending_inputs(node)
+        if degree:
+            self._pending[node] = degree
+        else:
+            self._schedule([node])
+
+    def add_nodes(self, nodes):
+        """Add several nodes to plan.
+
+        Inputs of nodes must be set before. The sequence of execution is
+        detected once after adding of all nodes.
+        """
+        for node in nodes:
+            self._nodes[node] = None
+
         self._detect_sequence()
 
     def remove_node(self, node):
@@ -290,19 +417,39 @@ class Plan(Activity):
         if node not in self._nodes:
             raise RuntimeError('No such node')
 
-        for _node in self._nodes:
-            if node in _node.inputs:
-                _node.inputs.remove(node)
+        calculated = self._is_calculated(node)
+        ready = []
+        for succ in self._successors.pop(node, {}):
+            if succ is node:
+                continue
 
-        self._nodes.remove(node)
-        self._detect_sequence()
+            while node in succ.inputs:
+                succ.inputs.remove(node)
+
+            if calculated or (succ not in self._pending):
+                continue
+
+            self._pending[succ] -= 1
+            if self._pending[succ] == 0:
+                del self._pending[succ]
+                ready.append(succ)
+
+        self._unlink(node)
+        del self._nodes[node]
+        self._sequence.pop(node, None)
+        self._pending.pop(node, None)
+
+        self._schedule(ready)
 
     def clear(self):
         """Clear plan."""
-        self._nodes = []
+        self._nodes = {}
         self._inputs = []
+        self._input_set = set()
         self._outputs = []
-        self._sequence = []
+        self._successors = {}
+        self._pending = {}
+        self._sequence = {}
 
     def get_outputs(self):
         """Return output nodes."""
@@ -323,6 +470,7 @@ class Plan(Activity):
     def set_inputs(self, inputs):
         """Set input nodes."""
         self._inputs = inputs
+        self._input_set = set(inputs)
         self._detect_sequence()
 
     inputs = property(get_inputs,
@@ -331,7 +479,7 @@ class Plan(Activity):
 
     def get_nodes(self):
         """Return the list of nodes."""
-        return self._nodes
+        return list(self._nodes)
 
     def set_progress_hook(self, func):
         """Set progress handler."""
@@ -350,25 +498,17 @@ class Plan(Activity):
             if self._progress_func is not None:
                 self._progress_func()
 
-        while True:
-            finished = True
-            for node in self._nodes:
-                if not node.is_output_ready() and node.is_inputs_ready():
-                    finished = False
-                    input_nodes = node.get_inputs()
-
-                    node_data = []
-                    for input_node in input_nodes:
-                        node_data.append(input_node.get_result())
+        for node in self._sequence:
+            node_data = []
+            for input_node in node.inputs:
+                node_data.append(input_node.get_result())
 
-                    node.run_start_hook()
-                    node(node_data)
-                    node.run_stop_hook()
+            node.run_start_hook()
+            node(node_data)
+            node.run_stop_hook()
 
-                    if self._progress_func is not None:
-                        self._progress_func()
-            if finished:
-                break
+            if self._progress_func is not None:
+                self._progress_func()
 
         return [output.get_result() for output in self._outputs]
 
@@ -399,6 +539,63 @@ class Plan(Activity):
 
         return [output.get_result() for output in self._outputs]
 
+    def parallel_run(self, data):
+        """Run plan dispatching ready nodes to executor.
+
+        The node is submitted to executor as soon as all its inputs are
+        calculated, so independent branches of plan are executed
+        concurrently. Hooks and progress handler are called in the
+        calling thread: start hook before submitting of node, stop hook
+        and progress handler after the node is finished.
+
+        The node is executed on its shallow copy without inputs,
+        result and hooks, the work (and worker) is shared with the node
+        of plan. So in thread pool stateful worker is changed in place
+        and must be safe for concurrent use if the same worker is used
+        in several nodes. When process pool is used, nodes and their
+        works must be picklable, the work is executed on its copy in
+        another process, so changes in the state of worker are not
+        returned to plan.
+        """
+        for node in self._nodes:
+            node.clear_result()
+
+        waiting = {node: len(set(node.inputs)) for node in self._sequence}
+        running = {}
+
+        def submit(node, node_data):
+            node.run_start_hook()
+            running[self._executor.submit(_call_node, _detach(node),
+                                          node_data)] = node
+
+        for node, node_data in zip(self._inputs, data):
+            submit(node, [node_data])
+
+        for node, degree in waiting.items():
+            if degree == 0:
+                submit(node, [])
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                node.set_result(future.result())
+                node.run_stop_hook()
+
+                if self._progress_func is not None:
+                    self._progress_func()
+
+                for succ in self._successors.get(node, ()):
+                    if succ not in waiting:
+                        continue
+
+                    waiting[succ] -= 1
+                    if waiting[succ] == 0:
+                        submit(succ,
+                               [inpt.get_result() for inpt in succ.inputs])
+
+        return [output.get_result() for output in self._outputs]
+
     def verify(self):
         """Verify plan.
 
@@ -421,6 +618,28 @@ class Plan(Activity):
         return self._run_func(*args, **kwargs)
 
 
+def _detach(node):
+    """Return copy of node with no links to plan.
+
+    Inputs are replaced by placeholders (MapNode needs their number),
+    result and hooks are dropped, so the copy can be sent to another
+    process without the data of the whole plan.
+    """
+    res = copy(node)
+    res.inputs = [None] * len(node.inputs)
+    res.clear_result()
+    res.set_start_hook(None)
+    res.set_stop_hook(None)
+
+    return res
+
+
+def _call_node(node, data):
+    node(data)
+
+    return node.get_result()
+
+
 def get_plan_from_dict(plan_dict, params=None):
     """Create and return instance of Plan described in dictionary.
 
@@ -470,7 +689,9 @@ def get_plan_from_dict(plan_dict, params=None):
         if 'inputs' in node_dict:
             inputs = [nodes[key] for key in node_dict['inputs']]
 
-        plan.add_node(nodes[node_dict['id']], inputs=inputs)
+        nodes[node_dict['id']].inputs = inputs
+
+    plan.add_nodes(nodes.values())
 
     if 'inputs' in plan_dict:
         plan.set_inputs([nodes[key] for key in plan_dict['inputs']])
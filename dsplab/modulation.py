@@ -15,13 +15,21 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Modulation and demodulation."""
 
-from math import pi, cos, isnan
+from math import pi, cos, isnan, ceil
 import numpy as np
 from numpy import unwrap, angle, diff
 import scipy.signal as sig
 
 
-def harm(length, sample_rate, amp, freq, phi=0, noise_amp=None, noise_ph=None):
+def harm(length,
+         sample_rate,
+         amp,
+         freq,
+         phi=0,
+         noise_amp=None,
+         noise_ph=None,
+         vectorized=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Generate harmonic signal.
 
     Parameters
@@ -40,6 +48,9 @@ def harm(length, sample_rate, amp, freq, phi=0, noise_amp=None, noise_ph=None):
         Returns noise value added to amplitude.
     noise_ph: callable
         Returns noise value added to full phase.
+    vectorized: bool
+        If True, the signal is calculated for all time values at
+        once. See notes.
 
     Returns
     -------
@@ -47,9 +58,24 @@ def harm(length, sample_rate, amp, freq, phi=0, noise_amp=None, noise_ph=None):
         Signal values.
     : np.array
         Time values.
+
+    Notes
+    -----
+    In vectorized mode the functions of time are called with the
+    whole array of time values. If function can not process arrays, it
+    is called for every time value. The noise functions are called
+    with number of values and must return array of noise values of
+    this length. Otherwise (for example, noise function has no
+    arguments) it is called with no arguments for every sample.
     """
     ts = np.arange(0, length, 1 / sample_rate)
 
+    if vectorized:
+        amps = amp + _noise(noise_amp, len(ts))
+        phases = 2 * pi * freq * ts + phi + _noise(noise_ph, len(ts))
+
+        return amps * np.cos(phases), ts
+
     xs = []
     for t in ts:
         x = _ns(amp, noise_amp) * cos(_ns(2 * pi * freq * t + phi, noise_ph))
@@ -64,7 +90,9 @@ def amp_mod(length,
             freq,
             phi=0,
             noise_amp=None,
-            noise_ph=None):
+            noise_ph=None,
+            vectorized=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Amplitude modulation.
 
     Parameters
@@ -83,6 +111,9 @@ def amp_mod(length,
         Returns noise value added to amplitude.
     noise_ph: callable
         Returns noise value added to full phase.
+    vectorized: bool
+        If True, the signal is calculated for all time values at
+        once. See notes for harm().
 
     Returns
     -------
@@ -95,6 +126,14 @@ def amp_mod(length,
 
     full_phase = phi
     delta_ph = 2 * pi * freq / sample_rate
+
+    if vectorized:
+        phases = _accumulate(full_phase, np.full(len(ts), delta_ph))
+        phases += _noise(noise_ph, len(ts))
+        xs = _values(func, ts) * np.cos(phases) + _noise(noise_amp, len(ts))
+
+        return xs, ts
+
     xs = []
 
     for t in ts:
@@ -112,8 +151,10 @@ def freq_mod(length,
              func,
              phi=0,
              noise_amp=None,
-             noise_ph=None):
-    """Amplitude modulation.
+             noise_ph=None,
+             vectorized=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Frequency modulation.
 
     Parameters
     ----------
@@ -132,6 +173,9 @@ def freq_mod(length,
         Returns noise value added to amplitude.
     noise_ph: callable
         Returns noise value added to full phase.
+    vectorized: bool
+        If True, the signal is calculated for all time values at
+        once. See notes for harm().
 
     Returns
     -------
@@ -145,6 +189,14 @@ def freq_mod(length,
     ts = np.arange(0, length, 1 / sample_rate)
 
     full_phase = phi
+
+    if vectorized:
+        phs = _accumulate(full_phase, 2 * pi * _values(func, ts) / sample_rate)
+        phases = phs + _noise(noise_ph, len(ts))
+        xs = amp * np.cos(phases) + _noise(noise_amp, len(ts))
+
+        return xs, phs, ts
+
     xs, phs = [], []
 
     for t in ts:
@@ -164,7 +216,9 @@ def phase_mod(length,
               freq,
               func,
               noise_amp=None,
-              noise_ph=None):
+              noise_ph=None,
+              vectorized=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Phase modulation.
 
     Parameters
@@ -184,6 +238,9 @@ def phase_mod(length,
         Returns noise value added to amplitude.
     noise_ph: callable
         Returns noise value added to full phase.
+    vectorized: bool
+        If True, the signal is calculated for all time values at
+        once. See notes for harm().
 
     Returns
     -------
@@ -193,6 +250,14 @@ def phase_mod(length,
         Time values.
     """
     ts = np.arange(0, length, 1 / sample_rate)
+
+    if vectorized:
+        args = 2 * pi * freq * ts + _values(func, ts)
+        args += _noise(noise_ph, len(ts))
+        xs = amp * np.cos(args) + _noise(noise_amp, len(ts))
+
+        return xs, ts
+
     xs = []
 
     for t in ts:
@@ -204,7 +269,9 @@ def phase_mod(length,
     return np.array(xs), ts
 
 
-def freq_amp_mod(length, sample_rate, a_func, f_func, phi=0):
+def freq_amp_mod(length, sample_rate, a_func, f_func, phi=0,
+                 vectorized=False):
+    # pylint: disable=too-many-positional-arguments
     """Simultaneous frequency and amplitude modulation.
 
     Parameters
@@ -220,6 +287,9 @@ def freq_amp_mod(length, sample_rate, a_func, f_func, phi=0):
         time.
     phi: float
         Initial phase (radians).
+    vectorized: bool
+        If True, the signal is calculated for all time values at
+        once. See notes for harm().
 
     Returns
     -------
@@ -233,6 +303,13 @@ def freq_amp_mod(length, sample_rate, a_func, f_func, phi=0):
     ts = np.arange(0, length, 1 / sample_rate)
 
     full_phase = phi
+
+    if vectorized:
+        phs = _accumulate(full_phase,
+                          2 * pi * _values(f_func, ts) / sample_rate)
+
+        return _values(a_func, ts) * np.cos(phs), phs, ts
+
     xs = []
     phs = []
     for t in ts:
@@ -243,6 +320,122 @@ def freq_amp_mod(length, sample_rate, a_func, f_func, phi=0):
     return np.array(xs), np.array(phs), ts
 
 
+def amp_mod_blocks(length,
+                   sample_rate,
+                   func,
+                   freq,
+                   phi=0,
+                   noise_amp=None,
+                   noise_ph=None,
+                   block_len=4096):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Amplitude modulation by blocks.
+
+    The same as amp_mod() in vectorized mode, but the signal is
+    produced by blocks of fixed length. The full phase is carried from
+    block to block, so the memory used does not depend on the length
+    of signal.
+
+    Parameters
+    ----------
+    length: float
+        Length pf signal (sec). If None, the blocks are produced
+        endlessly.
+    sample_rate: float
+        Sampling frequency (Hz).
+    func: Object
+        Function that returns amplitude value depending on time.
+    freq: float
+        Frequency of signal (Hz).
+    phi: float
+        Initial phase (radians).
+    noise_amp: callable
+        Returns noise value added to amplitude.
+    noise_ph: callable
+        Returns noise value added to full phase.
+    block_len: int
+        Number of samples in block. The last block may be shorter.
+
+    Yields
+    ------
+    : np.array
+        Signal values.
+    : np.array
+        Time values.
+    """
+    full_phase = phi
+    delta_ph = 2 * pi * freq / sample_rate
+
+    for ts in _time_blocks(length, sample_rate, block_len):
+        incs = np.full(len(ts), delta_ph)
+        phases = _accumulate(full_phase, incs)
+        full_phase = phases[-1] + incs[-1]
+
+        phases += _noise(noise_ph, len(ts))
+        xs = _values(func, ts) * np.cos(phases) + _noise(noise_amp, len(ts))
+
+        yield xs, ts
+
+
+def freq_mod_blocks(length,
+                    sample_rate,
+                    amp,
+                    func,
+                    phi=0,
+                    noise_amp=None,
+                    noise_ph=None,
+                    block_len=4096):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Frequency modulation by blocks.
+
+    The same as freq_mod() in vectorized mode, but the signal is
+    produced by blocks of fixed length. The full phase is carried from
+    block to block, so the memory used does not depend on the length
+    of signal.
+
+    Parameters
+    ----------
+    length: float
+        Length pf signal (sec). If None, the blocks are produced
+        endlessly.
+    sample_rate: float
+        Sampling frequency (Hz).
+    amp: float
+        Amplitude of signal.
+    func: Object
+        Function that returns frequency values (in Hz) depending on
+        time.
+    phi: float
+        Initial phase (radians).
+    noise_amp: callable
+        Returns noise value added to amplitude.
+    noise_ph: callable
+        Returns noise value added to full phase.
+    block_len: int
+        Number of samples in block. The last block may be shorter.
+
+    Yields
+    ------
+    : np.array
+        Signal values.
+    : np.array
+        Full phase values.
+    : np.array
+        Time values.
+    """
+    full_phase = phi
+
+    for ts in _time_blocks(length, sample_rate, block_len):
+        incs = 2 * pi * _values(func, ts) / sample_rate
+        phs = _accumulate(full_phase, incs)
+        full_phase = phs[-1] + incs[-1]
+
+        phases = phs + _noise(noise_ph, len(ts))
+        xs = amp * np.cos(phases) + _noise(noise_amp, len(ts))
+
+        yield xs, phs, ts
+
+
 def iq_demod(xdata, tdata, f_central, a_coeffs, b_coeffs):
     """Return instantaneous frequency of modulated signal using IQ processing.
 
@@ -277,6 +470,137 @@ def iq_demod(xdata, tdata, f_central, a_coeffs, b_coeffs):
     return freq, tdata[:-1]
 
 
+class IqDemodulator:
+    # pylint: disable=too-many-instance-attributes
+    """Block-wise IQ demodulator.
+
+    Calculates the instantaneous frequency of modulated signal by
+    blocks. The states of filters, the last value of unwrapped phase
+    and the last time value are kept between calls, so the
+    concatenated results for all blocks are the same as the result of
+    iq_demod() for the whole signal.
+
+    Parameters
+    ----------
+    f_central: float
+        Carrier frequency.
+    a_coeffs: array_like
+        a values of filter.
+    b_coeffs: array_like
+        b values of filter.
+    """
+
+    def __init__(self, f_central, a_coeffs, b_coeffs):
+        self.f_central = f_central
+        self.a_coeffs = np.asarray(a_coeffs)
+        self.b_coeffs = np.asarray(b_coeffs)
+
+        self._zi_i = None
+        self._zi_q = None
+        self._t_first = None
+        self._t_last = None
+        self._dt = None
+        self._angle_last = None
+        self._correction = 0.0
+        self._phase_last = None
+
+        self.reset()
+
+    def reset(self):
+        """Reset the state of demodulator."""
+        zi_len = max(len(self.a_coeffs), len(self.b_coeffs)) - 1
+        self._zi_i = np.zeros(zi_len)
+        self._zi_q = np.zeros(zi_len)
+        self._t_first = None
+        self._t_last = None
+        self._dt = None
+        self._angle_last = None
+        self._correction = 0.0
+        self._phase_last = None
+
+    def __call__(self, xdata, tdata):
+        """Process the next block of signal.
+
+        Parameters
+        ----------
+        xdata: np.ndarray
+            Signal values.
+        tdata: np.ndarray
+            Time values.
+
+        Returns
+        -------
+        : np.ndarray of floats
+            Instantaneous frequency values. The first block gives one
+            value less than the number of samples.
+        : np.ndarray
+            Time values.
+        """
+        xdata = np.asarray(xdata)
+        tdata = np.asarray(tdata)
+        if len(xdata) == 0:
+            return np.array([]), np.array([])
+
+        arg = 2 * pi * self.f_central * tdata
+        muli_low, self._zi_i = sig.lfilter(self.b_coeffs,
+                                           self.a_coeffs,
+                                           xdata * np.cos(arg),
+                                           zi=self._zi_i)
+        mulq_low, self._zi_q = sig.lfilter(self.b_coeffs,
+                                           self.a_coeffs,
+                                           xdata * np.sin(arg),
+                                           zi=self._zi_q)
+        phase = -self._unwrap(angle(muli_low + 1j * mulq_low))
+
+        self._update_dt(tdata)
+
+        t_new = tdata[:-1]
+        if self._phase_last is not None:
+            phase = np.concatenate(([self._phase_last], phase))
+            t_new = np.concatenate(([self._t_last], t_new))
+
+        self._phase_last = phase[-1]
+        self._t_last = tdata[-1]
+
+        if self._dt is None:
+            return np.array([]), np.array([])
+
+        freq = diff(phase) / 2 / pi / self._dt + self.f_central
+
+        return freq, t_new
+
+    def _update_dt(self, tdata):
+        if self._dt is not None:
+            return
+
+        if self._t_first is None:
+            self._t_first = tdata[0]
+            if len(tdata) > 1:
+                self._dt = tdata[1] - tdata[0]
+        else:
+            self._dt = tdata[0] - self._t_first
+
+    def _unwrap(self, angles):
+        """Unwrap angles continuing the previous blocks (as np.unwrap)."""
+        if self._angle_last is None:
+            prev = angles[0]
+        else:
+            prev = self._angle_last
+
+        dd = diff(np.concatenate(([prev], angles)))
+        ddmod = np.mod(dd + pi, 2 * pi) - pi
+        np.copyto(ddmod, pi, where=(ddmod == -pi) & (dd > 0))
+        corrections = ddmod - dd
+        np.copyto(corrections, 0, where=abs(dd) < pi)
+
+        self._angle_last = angles[-1]
+        corrections = np.cumsum(np.concatenate(([self._correction],
+                                                corrections)))[1:]
+        self._correction = corrections[-1]
+
+        return angles + corrections
+
+
 def digital_hilbert_filter(ntaps=101, window='hamming'):
     """Calculate digital hilbert filter.
 
@@ -327,21 +651,16 @@ def envelope_by_extremums(xdata, sample_rate=1, tdata=None):
     if tdata is None:
         tdata = np.linspace(0, (len(xdata) - 1) / sample_rate, len(xdata))
 
-    t_new = []
-    x_new = []
-    xabs = abs(xdata)
+    xabs = np.abs(np.asarray(xdata))
+    tdata = np.asarray(tdata)
 
-    for x_l, x_c, x_r, t_c in zip(xabs[:-2], xabs[1:-1], xabs[2:],
-                                  tdata[1:-1]):
-        if (x_l < x_c) and (x_c >= x_r):
-            t_new.append(t_c)
-            x_new.append(x_c)
+    x_l, x_c, x_r = xabs[:-2], xabs[1:-1], xabs[2:]
+    ind = np.flatnonzero((x_l < x_c) & (x_c >= x_r)) + 1
 
     if xabs[-1] > xabs[-2]:
-        t_new.append(tdata[-1])
-        x_new.append(xabs[-1])
+        ind = np.append(ind, len(xabs) - 1)
 
-    return np.array(x_new), np.array(t_new)
+    return xabs[ind], tdata[ind]
 
 
 def freq_by_extremums(xdata, sample_rate):
@@ -365,14 +684,10 @@ def freq_by_extremums(xdata, sample_rate):
 
     T = len(xdata) / sample_rate
 
-    max_total = 0
-    min_total = 0
-    for prev, curr, nxt in zip(xdata[:-2], xdata[1:-1], xdata[2:]):
-        if (prev < curr) and (curr >= nxt):
-            max_total += 1
-
-        if (prev > curr) and (curr <= nxt):
-            min_total += 1
+    xdata = np.asarray(xdata)
+    prev, curr, nxt = xdata[:-2], xdata[1:-1], xdata[2:]
+    max_total = int(np.count_nonzero((prev < curr) & (curr >= nxt)))
+    min_total = int(np.count_nonzero((prev > curr) & (curr <= nxt)))
 
     if xdata[0] > xdata[1]:
         max_total += 1
@@ -389,12 +704,10 @@ def freq_by_zeros(xdata, sample_rate):
 
     T = len(xdata) / sample_rate
 
-    zeros_total = 0
-    for prev, curr in zip(xdata[:-1], xdata[1:]):
-        if prev * curr < 0:
-            zeros_total += 1
-        elif prev != 0 and curr == 0:
-            zeros_total += 1
+    xdata = np.asarray(xdata)
+    prev, curr = xdata[:-1], xdata[1:]
+    zeros_total = int(
+        np.count_nonzero((prev * curr < 0) | ((prev != 0) & (curr == 0))))
 
     return zeros_total / 2 / T
 
@@ -416,13 +729,11 @@ def wave_lens(xdata, tdata):
     : np.ndarray
         Time values.
     """
-    tms = []
-    for t_c, x_p, x_c in zip(tdata[1:], xdata[:-1], xdata[1:]):
-        if x_p * x_c < 0:
-            tms.append(t_c)
+    xdata = np.asarray(xdata)
+    tms = np.asarray(tdata)[1:][xdata[:-1] * xdata[1:] < 0]
 
     lens = np.diff(tms) * 2
-    t_lens = np.array(tms[1:])
+    t_lens = tms[1:]
 
     return lens, t_lens
 
@@ -446,7 +757,7 @@ def freqs_by_wave_len(xdata, tdata, cut_nans=True):
         Freqs values.
     """
     wls, t_wl = wave_lens(xdata, tdata)
-    freqs = 1 / linint(wls, t_wl, tdata)
+    freqs = 1 / linint(wls, t_wl, tdata, assume_sorted=True)
 
     if cut_nans:
         freqs_cut = []
@@ -462,7 +773,7 @@ def freqs_by_wave_len(xdata, tdata, cut_nans=True):
     return freqs
 
 
-def linint(xdata, tdata, ts_new):
+def linint(xdata, tdata, ts_new, assume_sorted=False):
     """Find values of xdata in ts_new points.
 
     Parameters
@@ -473,19 +784,31 @@ def linint(xdata, tdata, ts_new):
         Time values.
     ts_new: np.ndarray
         New time values.
+    assume_sorted: bool
+        If True, time values are considered as sorted in ascending
+        order and the sorting is skipped.
 
     Returns
     -------
     : np.ndarray
-        New signal values.
+        New signal values. The values outside the range of tdata are
+        nan.
     """
-    x_new = np.zeros(len(ts_new)) * np.nan
-    for x_p, t_p, x_c, t_c in zip(xdata[:-1], tdata[:-1], xdata[1:],
-                                  tdata[1:]):
-        slope = (x_c - x_p) / (t_c - t_p)
-        intercept = x_p - slope * t_p
-        ind = (ts_new >= t_p) & (ts_new <= t_c)
-        x_new[ind] = slope * ts_new[ind] + intercept
+    xdata = np.asarray(xdata, dtype=float)
+    tdata = np.asarray(tdata, dtype=float)
+    ts_new = np.asarray(ts_new, dtype=float)
+
+    x_new = np.full(len(ts_new), np.nan)
+    if len(tdata) < 2:
+        return x_new
+
+    if not assume_sorted:
+        order = np.argsort(tdata, kind='stable')
+        tdata = tdata[order]
+        xdata = xdata[order]
+
+    ind = (ts_new >= tdata[0]) & (ts_new <= tdata[-1])
+    x_new[ind] = np.interp(ts_new[ind], tdata, xdata)
 
     return x_new
 
@@ -495,3 +818,58 @@ def _ns(x, func=None):
         return x + func()
 
     return x
+
+
+def _values(func, ts):
+    """Return values of function of time for array of time values."""
+    try:
+        return np.broadcast_to(np.asarray(func(ts), dtype=float), ts.shape)
+    except (TypeError, ValueError):
+        return np.array([func(t) for t in ts], dtype=float)
+
+
+def _noise(func, size):
+    """Return array of noise values or zero if there is no noise."""
+    if not func:
+        return 0
+
+    try:
+        res = func(size)
+    except TypeError:
+        res = None
+
+    if np.shape(res) == (size, ):
+        return np.asarray(res, dtype=float)
+
+    return np.array([func() for _ in range(size)], dtype=float)
+
+
+def _accumulate(start, incs):
+    """Return start and cumulative sums of start and increments except the
+    last one."""
+    res = np.empty(len(incs))
+    if len(res) == 0:
+        return res
+
+    res[0] = start
+    res[1:] = incs[:-1]
+
+    return np.cumsum(res)
+
+
+def _time_blocks(length, sample_rate, block_len):
+    """Generate blocks of time values the same as in
+    np.arange(0, length, 1 / sample_rate)."""
+    step = 1 / sample_rate
+    total = None
+    if length is not None:
+        total = max(ceil(length / step), 0)
+
+    start = 0
+    while (total is None) or (start < total):
+        stop = start + block_len
+        if total is not None:
+            stop = min(stop, total)
+
+        yield np.arange(start, stop) * step
+        start = stop
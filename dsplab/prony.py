@@ -17,6 +17,7 @@
 
 import numpy as np
 from numpy import linalg
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 def prony_decomp(xdata, ncomp):
@@ -38,31 +39,218 @@ def prony_decomp(xdata, ncomp):
     : np.array
         Components.
     """
-
+    xdata = np.asarray(xdata)
     samples_total = len(xdata)
 
     if 2 * ncomp > samples_total:
         return None
 
-    f_mat = []
-    for i in range(ncomp, samples_total):
-        row = [xdata[i - j - 1] for j in range(0, ncomp)]
-        f_mat.append(row)
+    f_mat = _f_matrix(xdata, ncomp)
     f_col = xdata[ncomp:]
 
     f_sols = linalg.lstsq(f_mat, f_col, rcond=None)[0]
-    mu_vals = np.roots([1] + list(-f_sols))
+    mu_vals = np.roots(np.concatenate(([1], -f_sols)))
 
-    d_mat = []
-    for i in range(samples_total):
-        row = [mu_vals[j]**i for j in range(ncomp)]
-        d_mat.append(np.array(row))
+    d_mat = np.vander(mu_vals, samples_total, increasing=True).T
 
     c_vals = linalg.lstsq(d_mat, xdata, rcond=None)[0]
 
-    comps = []
-    for i in range(0, ncomp):
-        comp = [c_vals[i] * (mu_vals[i]**k) for k in range(samples_total)]
-        comps.append(np.array(comp).real)
+    comps = (c_vals[:, np.newaxis] * d_mat.T).real
+
+    return mu_vals, c_vals, comps
+
+
+def prony_decomp_batch(xdata, ncomp):
+    """Prony decomposition of many signals of the same length.
+
+    Least squares problems for all signals are solved at once, so it
+    is faster than calling of prony_decomp() for each signal.
+
+    Parameters
+    ----------
+    xdata: array_like
+        Signals (for example, windows of long signal). Time is the
+        last axis.
+    ncomp: integer
+        Number of components. 2*ncomp must be less tham length of
+        signals.
+
+    Returns
+    -------
+    : np.array
+        Mu-values. Shape is xdata.shape[:-1] + (ncomp, ).
+    : np.array
+        C-values. Shape is xdata.shape[:-1] + (ncomp, ).
+    : np.array
+        Components. Shape is xdata.shape[:-1] + (ncomp, samples).
+    """
+    xdata = np.asarray(xdata)
+    samples_total = xdata.shape[-1]
+
+    if 2 * ncomp > samples_total:
+        return None
+
+    f_mat = _f_matrix(xdata, ncomp)
+    f_col = xdata[..., ncomp:]
+
+    f_sols = _lstsq_batch(f_mat, f_col)
+    mu_vals = linalg.eigvals(_companion(f_sols))
+
+    d_mat = np.empty(xdata.shape[:-1] + (samples_total, ncomp),
+                     dtype=mu_vals.dtype)
+    d_mat[..., 0, :] = 1
+    d_mat[..., 1:, :] = mu_vals[..., np.newaxis, :]
+    np.multiply.accumulate(d_mat[..., 1:, :], axis=-2, out=d_mat[..., 1:, :])
+
+    c_vals = _lstsq_batch(d_mat, xdata)
+
+    comps = (c_vals[..., np.newaxis] * np.swapaxes(d_mat, -1, -2)).real
+
+    return mu_vals, c_vals, comps
+
+
+def _f_matrix(xdata, ncomp):
+    """Return matrix of linear prediction (strided view).
+
+    Row i contains ncomp samples preceding sample ncomp + i in
+    reversed order.
+    """
+    windows = sliding_window_view(xdata[..., :-1], ncomp, axis=-1)
+
+    return windows[..., ::-1]
+
+
+def _lstsq_batch(a_mat, b_col):
+    """Solve stack of least squares problems.
+
+    Minimum norm solutions are found by SVD with the same cutoff of
+    small singular values as in linalg.lstsq(rcond=None), so
+    rank-deficient matrices are handled like in prony_decomp().
+    """
+    u_mat, s_vals, vh_mat = linalg.svd(a_mat, full_matrices=False)
+    cutoff = np.finfo(s_vals.dtype).eps * max(a_mat.shape[-2:])
+    large = s_vals > cutoff * s_vals[..., :1]
+    s_inv = np.divide(1, s_vals, out=np.zeros_like(s_vals), where=large)
+
+    u_b = np.swapaxes(u_mat, -1, -2).conj() @ b_col[..., np.newaxis]
+    sols = np.swapaxes(vh_mat, -1, -2).conj() @ (s_inv[..., np.newaxis] * u_b)
+
+    return sols[..., 0]
+
+
+def _companion(coeffs):
+    """Return stack of companion matrices of polynomials
+    z**n - coeffs[0]*z**(n-1) - ... - coeffs[n-1] (like in
+    np.roots())."""
+    ncomp = coeffs.shape[-1]
+    mats = np.zeros(coeffs.shape[:-1] + (ncomp, ncomp), dtype=coeffs.dtype)
+    mats[..., 0, :] = coeffs
+    mats[..., range(1, ncomp), range(ncomp - 1)] = 1
+
+    return mats
+
+
+class PronyTracker:
+    # pylint: disable=too-many-instance-attributes
+    """Prony decomposition in sliding window of signal coming by
+    samples.
+
+    Matrices of normal equations of linear prediction are updated by
+    rank-one updates when window slides, so the cost of the next
+    sample does not depend on the length of window (except of
+    periodical refreshing). Mu-values are the same as the ones of
+    prony_decomp() for the window (up to rounding).
+
+    Parameters
+    ----------
+    nwin: integer
+        Length of window.
+    ncomp: integer
+        Number of components. 2*ncomp must be less than nwin.
+    refresh: integer
+        Matrices are calculated from scratch every refresh samples to
+        prevent accumulation of rounding errors. Default is nwin.
+    """
+
+    def __init__(self, nwin, ncomp, refresh=None):
+        if 2 * ncomp > nwin:
+            raise ValueError('2*ncomp must be less than nwin.')
+
+        self.nwin = nwin
+        self.ncomp = ncomp
+        self.refresh = refresh or nwin
+        self.reset()
+
+    def reset(self):
+        """Forget all samples."""
+        self.mu_vals = None
+        self._buf = np.zeros(2 * self.nwin)
+        self._pos = 0
+        self._samples = 0
+        self._updates = 0
+        self._gram = np.zeros((self.ncomp, self.ncomp))
+        self._rhs = np.zeros(self.ncomp)
+
+    @property
+    def window(self):
+        """Samples in window (view of internal buffer)."""
+        return self._buf[max(self._pos - self.nwin, 0):self._pos]
+
+    def __call__(self, sample):
+        """Add sample and return mu-values for window.
+
+        Parameters
+        ----------
+        sample: float
+            Sample of signal.
+
+        Returns
+        -------
+        : np.array
+            Mu-values. None while window is not filled.
+        """
+        if self._pos == len(self._buf):
+            self._buf[:self.nwin] = self._buf[self._pos - self.nwin:]
+            self._pos = self.nwin
+
+        if self._samples >= self.nwin:
+            self._update(self._pos - self.nwin + self.ncomp, -1)
+
+        self._buf[self._pos] = sample
+        self._pos += 1
+        self._samples += 1
+
+        if self._samples > self.ncomp:
+            self._update(self._pos - 1, 1)
+
+        if self._samples < self.nwin:
+            return None
+
+        self._updates += 1
+        if self._updates >= self.refresh:
+            self._updates = 0
+            f_mat = _f_matrix(self.window, self.ncomp)
+            self._gram = f_mat.T @ f_mat
+            self._rhs = f_mat.T @ self.window[self.ncomp:]
+
+        try:
+            f_sols = linalg.solve(self._gram, self._rhs)
+        except linalg.LinAlgError:
+            f_sols = linalg.lstsq(self._gram, self._rhs, rcond=None)[0]
+
+        self.mu_vals = np.roots(np.concatenate(([1], -f_sols)))
+
+        return self.mu_vals
+
+    def c_vals(self):
+        """Return c-values for window and current mu-values."""
+        d_mat = np.vander(self.mu_vals, self.nwin, increasing=True).T
+
+        return linalg.lstsq(d_mat, self.window, rcond=None)[0]
 
-    return mu_vals, c_vals, np.array(comps)
+    def _update(self, pos, sign):
+        """Add (sign=1) or remove (sign=-1) row of linear prediction
+        for sample at pos of buffer."""
+        row = self._buf[pos - self.ncomp:pos][::-1]
+        self._gram += sign * np.outer(row, row)
+        self._rhs += sign * self._buf[pos] * row
@@ -0,0 +1,156 @@
+# Copyright (C) 2017-2022 Aleksandr Popov
+# Copyright (C) 2021-2022 Kirill Butin
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Long recordings opened as memory maps.
+
+Raw file (samples without header) or NPY file is opened as np.memmap,
+so the signal is read from disk only when it is needed. Sample rate
+and the layout of raw file are kept in JSON file near the recording
+(file name with '.json' suffix), see save_meta().
+"""
+
+import json
+import os
+import numpy as np
+
+from dsplab.helpers import pretty_json
+
+META_SUFFIX = '.json'
+
+
+class Recording:
+    """Signal opened as memory map.
+
+    Parameters
+    ----------
+    data: np.memmap
+        Signal values. Time is the first axis, channels are the
+        second one (for multichannel recordings).
+    sample_rate: float
+        Sampling frequency (Hz).
+    t_start: float
+        Time of the first sample (sec).
+    """
+
+    def __init__(self, data, sample_rate, t_start=0):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.t_start = t_start
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def duration(self):
+        """Duration of recording (sec)."""
+        return len(self.data) / self.sample_rate
+
+    def get_time(self, start=0, stop=None):
+        """Return time values of samples from start to stop."""
+        if stop is None:
+            stop = len(self.data)
+
+        return self.t_start + np.arange(start, stop) / self.sample_rate
+
+    def chunks(self, chunk_len):
+        """Generate chunks of signal (views of memory map)."""
+        for start in range(0, len(self.data), chunk_len):
+            yield self.data[start:start + chunk_len]
+
+
+def open_recording(file_name,
+                   sample_rate=None,
+                   dtype=None,
+                   channels=None,
+                   offset=None,
+                   mode='r'):
+    # pylint: disable=too-many-positional-arguments
+    """Open recording as memory map.
+
+    Parameters which are not set are read from the JSON file with
+    meta data (if exists).
+
+    Parameters
+    ----------
+    file_name: str
+        Name of raw or NPY (with '.npy' extension) file.
+    sample_rate: float
+        Sampling frequency (Hz).
+    dtype: str or np.dtype
+        Type of samples in raw file (default is 'float32').
+    channels: int
+        Number of interleaved channels in raw file. If set, data is
+        two-dimensional.
+    offset: int
+        Size of header of raw file (in bytes).
+    mode: str
+        Mode of opening ('r', 'r+' or 'c'), see np.memmap.
+
+    Returns
+    -------
+    : Recording
+        Recording.
+    """
+    meta = load_meta(file_name)
+    if sample_rate is None:
+        sample_rate = meta.get('sample_rate')
+    if sample_rate is None:
+        raise ValueError('Sample rate of recording is unknown')
+
+    if file_name.endswith('.npy'):
+        data = np.load(file_name, mmap_mode=mode)
+    else:
+        if dtype is None:
+            dtype = meta.get('dtype', 'float32')
+        if channels is None:
+            channels = meta.get('channels')
+        if offset is None:
+            offset = meta.get('offset', 0)
+
+        data = np.memmap(file_name, dtype=dtype, mode=mode, offset=offset)
+        if channels:
+            data = data.reshape(-1, channels)
+
+    return Recording(data, sample_rate, meta.get('t_start', 0))
+
+
+def load_meta(file_name):
+    """Return meta data of recording (empty dict if there is no file)."""
+    meta_name = file_name + META_SUFFIX
+    if not os.path.exists(meta_name):
+        return {}
+
+    with open(meta_name, encoding='utf-8') as buf:
+        return json.load(buf)
+
+
+def save_meta(file_name, sample_rate, **kwargs):
+    """Save meta data of recording to JSON file.
+
+    Parameters
+    ----------
+    file_name: str
+        Name of file with recording.
+    sample_rate: float
+        Sampling frequency (Hz).
+    kwargs: dict
+        Other meta data: dtype, channels, offset, t_start.
+    """
+    meta = dict(kwargs, sample_rate=sample_rate)
+    if 'dtype' in meta:
+        meta['dtype'] = np.dtype(meta['dtype']).str
+
+    with open(file_name + META_SUFFIX, 'w', encoding='utf-8') as buf:
+        buf.write(pretty_json(meta))
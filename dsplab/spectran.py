@@ -15,10 +15,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Some functions for spectral analysis."""
 
+import inspect
+from functools import lru_cache
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy import fftpack
 import scipy.signal as sig
 
+CACHE_SIZE = 64
+BATCH_SIZE = 256
+
+_FFT_OUT = 'out' in inspect.signature(np.fft.fft).parameters
+
 
 def spectrum(xdata,
              sample_rate=1,
@@ -26,7 +34,9 @@ def spectrum(xdata,
              one_side=False,
              return_amplitude=True,
              extra_len=None,
-             save_energy=False):
+             save_energy=False,
+             axis=-1):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Return the Fourier spectrum of signal.
 
     Parameters
@@ -50,36 +60,149 @@ def spectrum(xdata,
         False, the X (spectrum) is multiplied to 2/len(xdata). Use False
         if you want to see the correct amplitude of components in
         spectrum.
+    axis: int
+        Axis of time (default is -1). Spectrums are placed along the
+        same axis.
 
     Returns
     -------
     : np.ndarray of complex numbers
         Spectrum
     : np.ndarray of floats
-        Frequency values (Hz)
+        Frequency values (Hz). The array is read-only.
     """
-    win = sig.get_window(window, len(xdata))
-    x_faded = xdata * win * len(win) / sum(win)
+    xdata = np.moveaxis(np.asarray(xdata), axis, -1)
+    x_len = xdata.shape[-1]
+
+    x_faded = xdata * _window_weights(window, x_len)
 
-    actual_len = len(xdata)
+    actual_len = x_len
     if extra_len:
         actual_len = max(extra_len, actual_len)
 
     sp_comp = fftpack.fft(x_faded, actual_len)
     if not save_energy:
-        sp_comp *= 2 / len(xdata)
+        sp_comp *= 2 / x_len
 
-    freqs = np.fft.fftfreq(len(sp_comp), 1 / sample_rate)
+    freqs = _freqs(actual_len, sample_rate)
 
     if one_side:
-        ind = freqs >= 0
+        ind = slice(0, (actual_len + 1) // 2)
         freqs = freqs[ind]
-        sp_comp = sp_comp[ind]
+        sp_comp = sp_comp[..., ind]
 
     if return_amplitude:
-        return abs(sp_comp), freqs
+        sp_comp = abs(sp_comp)
+
+    return np.moveaxis(sp_comp, -1, axis), freqs
+
 
-    return sp_comp, freqs
+class SpectrumAnalyzer:
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """Spectrums of frames of fixed length.
+
+    Analyzer is configured once and owns preallocated buffers, so the
+    calculation of spectrum of the next frame does not allocate new
+    arrays (with numpy >= 2.0, which supports out argument in FFT
+    functions). The result is the same as the result of spectrum().
+
+    Parameters
+    ----------
+    length: int
+        Length of frame.
+    sample_rate: float
+        Sampling frequency (Hz)
+    window: str
+        Window.
+    one_side: boolean
+        If True, the one-side spectrum is calculated.
+    return_amplitude: boolean
+        If True, the amplitude spectrum is calculated.
+    nfft: int
+        Length of the FFT. If None or less than length, the FFT length
+        is length.
+    save_energy: boolean
+        If True, the result of FFT has the same energy as signal. If
+        False, the spectrum is multiplied to 2/length.
+    """
+
+    def __init__(self,
+                 length,
+                 sample_rate=1,
+                 window='hamming',
+                 one_side=False,
+                 return_amplitude=True,
+                 nfft=None,
+                 save_energy=False):
+        # pylint: disable=too-many-positional-arguments
+        self.length = length
+        self.one_side = one_side
+        self.return_amplitude = return_amplitude
+
+        fft_len = length
+        if nfft:
+            fft_len = max(nfft, length)
+
+        spec_len = fft_len
+        if one_side:
+            spec_len = (fft_len + 1) // 2
+
+        self.freqs = _freqs(fft_len, sample_rate)[:spec_len]
+
+        self._weights = _window_weights(window, length)
+        self._scale = None
+        if not save_energy:
+            self._scale = 2 / length
+
+        if one_side:
+            self._faded = np.zeros(fft_len)
+            self._faded_head = self._faded[:length]
+            self._spec_full = np.empty(fft_len // 2 + 1, dtype=complex)
+        else:
+            self._faded = np.zeros(fft_len, dtype=complex)
+            self._faded_head = self._faded.real[:length]
+            self._spec_full = np.empty(fft_len, dtype=complex)
+
+        self._spec = self._spec_full[:spec_len]
+        self._amp = np.empty(spec_len)
+
+    def __call__(self, xdata, out=None):
+        """Calculate spectrum of frame.
+
+        Parameters
+        ----------
+        xdata: np.ndarray
+            Frame (signal values), length must be equal to length of
+            analyzer.
+        out: np.ndarray
+            Array for result. If not set, the internal buffer is used,
+            it is overwritten on the next call.
+
+        Returns
+        -------
+        : np.ndarray
+            Spectrum (amplitude or complex).
+        """
+        np.multiply(xdata, self._weights, out=self._faded_head)
+
+        if self.one_side:
+            _fft_into(np.fft.rfft, self._faded, self._spec_full)
+        else:
+            _fft_into(np.fft.fft, self._faded, self._spec_full)
+
+        if self.return_amplitude:
+            res = self._amp if out is None else out
+            np.abs(self._spec, out=res)
+        else:
+            res = self._spec
+            if out is not None:
+                np.copyto(out, res)
+                res = out
+
+        if self._scale is not None:
+            np.multiply(res, self._scale, out=res)
+
+        return res
 
 
 def stft(xdata,
@@ -88,7 +211,11 @@ def stft(xdata,
          nstep=None,
          window='hamming',
          nfft=None,
-         padded=False):
+         padded=False,
+         axis=-1,
+         one_side=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    # pylint: disable=too-many-locals,unused-argument
     """Return result of short-time fourier transform.
 
     Parameters
@@ -96,7 +223,8 @@ def stft(xdata,
     xdata: numpy.ndarray
         Signal.
     sample_rate: float
-       Sampling frequency (Hz).
+       Sampling frequency (Hz). Not used (spectrums do not depend on
+       it), kept for compatibility.
     nseg: int
         Length of segment (in samples).
     nstep: int
@@ -107,34 +235,149 @@ def stft(xdata,
     nfft: int
         Length of the FFT. If None or less than nseg, the FFT length
         is nseg.
+    padded: bool
+        If True, the signal is padded with zeros to the length
+        multiple of nseg.
+    axis: int
+        Axis of time (default is -1).
+    one_side: bool
+        If True, the one-side spectrums are calculated with real FFT
+        (the same frequencies as in spectrum() with one_side=True).
 
     Returns
     -------
     : numpy.ndarray
-        Result of STFT, two-side spectrums.
+        Result of STFT, two-side (or one-side) spectrums. Segments and
+        frequencies are the last two axes, the other axes of xdata
+        (channels) are placed before them.
+
+    Notes
+    -----
+    Signal is not copied (only the end of signal if padded is True),
+    segments are transformed by batches of BATCH_SIZE. So xdata can
+    be a memory map (np.memmap) of long recording.
     """
     if not nstep:
         nstep = nseg // 2
 
-    x_copy = xdata.copy()
+    x_moved = np.moveaxis(np.asarray(xdata), axis, -1)
+
+    fft_len = nseg
+    if nfft:
+        fft_len = max(nfft, nseg)
+
+    spec_len = fft_len
+    if one_side:
+        spec_len = (fft_len + 1) // 2
 
+    segs = _segments(x_moved, nseg, nstep)
+    parts = [segs]
     if padded:
-        actual_len = len(x_copy) + (nseg - len(x_copy) % nseg) % nseg
-        zer = np.zeros(actual_len)
-        zer[:len(x_copy)] = x_copy
-        x_copy = zer
+        parts.append(_padded_segments(x_moved, nseg, nstep, segs.shape[-2]))
+
+    segs_total = sum(part.shape[-2] for part in parts)
+    res = np.empty(segs.shape[:-2] + (segs_total, spec_len))
+
+    weights = _window_weights(window, nseg)
+    ind = 0
+    for part in parts:
+        for start in range(0, part.shape[-2], BATCH_SIZE):
+            segs_faded = part[..., start:start + BATCH_SIZE, :] * weights
+            if one_side:
+                specs = np.fft.rfft(segs_faded, fft_len)[..., :spec_len]
+            else:
+                specs = fftpack.fft(segs_faded, fft_len)
+            res[..., ind:ind + specs.shape[-2], :] = abs(specs)
+            ind += specs.shape[-2]
+
+    return res
+
+
+def _segments(xdata, nseg, nstep):
+    """Return segments of signal as strided view (no copy).
+
+    Time is the last axis of xdata. Segments and samples are the last
+    two axes of result.
+    """
+    x_len = xdata.shape[-1]
+    segs_total = 0
+    if x_len >= nseg:
+        segs_total = (x_len - nseg) // nstep + 1
+
+    step = xdata.strides[-1]
+
+    return as_strided(xdata,
+                      shape=xdata.shape[:-1] + (segs_total, nseg),
+                      strides=xdata.strides[:-1] + (step * nstep, step),
+                      writeable=False)
+
+
+class _Segmenter:
+    """Cut chunks of signal to segments keeping incomplete segment."""
 
-    specs = []
-    for i in range(0, len(x_copy) - nseg + 1, nstep):
-        seg = x_copy[i:i + nseg]
-        spec = spectrum(seg,
-                        sample_rate,
-                        extra_len=nfft,
-                        window=window,
-                        save_energy=True)[0]
-        specs.append(spec)
+    def __init__(self, nseg, nstep):
+        self.nseg = nseg
+        self.nstep = nstep
+        self.reset()
 
-    return np.array(specs)
+    def reset(self):
+        """Forget kept samples."""
+        self.samples_total = 0
+        self.segs_total = 0
+        self._tail = None
+        self._skip = 0
+
+    def push(self, xdata):
+        """Add chunk and return completed segments (see _segments())."""
+        xdata = np.asarray(xdata)
+        self.samples_total += xdata.shape[-1]
+
+        if self._skip:
+            skipped = min(self._skip, xdata.shape[-1])
+            xdata = xdata[..., skipped:]
+            self._skip -= skipped
+
+        buf = xdata
+        if self._tail is not None and self._tail.shape[-1]:
+            buf = np.concatenate((self._tail, xdata), axis=-1)
+
+        segs = _segments(buf, self.nseg, self.nstep)
+        segs_total = segs.shape[-2]
+
+        start = segs_total * self.nstep
+        if start > buf.shape[-1]:
+            self._skip = start - buf.shape[-1]
+        self._tail = buf[..., start:].copy()
+        self.segs_total += segs_total
+
+        return segs
+
+    def padding(self):
+        """Return zeros padding signal to the length multiple of nseg."""
+        pad_len = (self.nseg - self.samples_total % self.nseg) % self.nseg
+        if self._tail is None:
+            return np.zeros(pad_len)
+
+        return np.zeros(self._tail.shape[:-1] + (pad_len, ))
+
+
+def _padded_segments(xdata, nseg, nstep, skip):
+    """Return segments of signal padded with zeros to the length
+    multiple of nseg, which are not in first skip segments.
+
+    Only the end of signal is copied.
+    """
+    x_len = xdata.shape[-1]
+    actual_len = x_len + (nseg - x_len % nseg) % nseg
+    start = skip * nstep
+    tail_len = max(actual_len - start, 0)
+
+    tail = np.zeros(xdata.shape[:-1] + (tail_len, ),
+                    dtype=np.result_type(xdata, float))
+    copied = max(x_len - start, 0)
+    tail[..., :copied] = xdata[..., start:start + copied]
+
+    return _segments(tail, nseg, nstep)
 
 
 def calc_specgram(xdata,
@@ -143,7 +386,9 @@ def calc_specgram(xdata,
                   nseg=256,
                   nstep=None,
                   freq_bounds=None,
-                  extra_len=None):
+                  extra_len=None,
+                  axis=-1):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     """Return spectrogram data prepared to further plotting.
 
     Parameters
@@ -162,37 +407,412 @@ def calc_specgram(xdata,
         Bounds of showed band
     extra_len: integer
         Number of values using for fft
+    axis: int
+        Axis of time (default is -1).
 
     Return
     ------
     : np.ndarray
-        Array of spectrums
+        Array of spectrums. Frequencies and time are the last two
+        axes, the other axes of xdata (channels) are placed before
+        them.
     : np.ndarray
         Time values
     """
-    if len(xdata) < nseg:
+    x_len = np.shape(xdata)[axis]
+    if x_len < nseg:
         return [], []
 
     if tdata is None:
-        tdata = np.linspace(0, (len(xdata) - 1) * sample_rate, len(xdata))
+        t_first = (nseg - 1) / sample_rate
+        t_last = (x_len - 1) / sample_rate
     else:
         sample_rate = 1 / (tdata[1] - tdata[0])
+        t_first = tdata[nseg - 1]
+        t_last = tdata[-1]
 
     if not nstep:
         nstep = nseg // 2
 
-    specs = 2 * stft(xdata=xdata,
-                     sample_rate=sample_rate,
-                     nseg=nseg,
-                     nstep=nstep,
-                     nfft=extra_len,
-                     padded=True)
+    specs = stft(xdata=xdata,
+                 sample_rate=sample_rate,
+                 nseg=nseg,
+                 nstep=nstep,
+                 nfft=extra_len,
+                 padded=True,
+                 axis=axis)
+    specs *= 2
 
     if freq_bounds:
-        freqs = np.fft.fftfreq(len(specs[0]), 1 / sample_rate)
+        freqs = _freqs(specs.shape[-1], sample_rate)
         ind = (freqs >= freq_bounds[0]) & (freqs <= freq_bounds[1])
-        specs = specs[:, ind]
+        specs = specs[..., ind]
+
+    t_new = np.linspace(t_first, t_last, specs.shape[-2])
+
+    return np.swapaxes(specs, -1, -2), t_new
 
-    t_new = np.linspace(tdata[nseg - 1], tdata[-1], len(specs))
 
-    return np.transpose(specs), t_new
+class StreamingSpectrogram:
+    # pylint: disable=too-many-instance-attributes
+    """Spectrogram of signal coming by chunks.
+
+    Chunks can have any length. The samples of incomplete segment are
+    kept between calls, so the columns of spectrogram are the same as
+    in calc_specgram() for the whole signal. Each column is calculated
+    as soon as its segment is complete.
+
+    Parameters
+    ----------
+    sample_rate: float
+        Sampling frequency (Hz)
+    nseg: integer
+        Length of window (number of samples)
+    nstep: integer
+        Length of step between Fourier transforms
+    freq_bounds: tuple of 2 float
+        Bounds of showed band
+    extra_len: integer
+        Number of values using for fft
+    t_start: float
+        Time of the first sample (sec)
+    window: str
+        Window.
+
+    Notes
+    -----
+    Time of column is the time of the last sample of its segment
+    (t_start + (k*nstep + nseg - 1)/sample_rate for k-th column). It
+    is the same as t_new in calc_specgram() (with or without tdata) if
+    the end of signal is not padded, i.e. the last segment ends at the
+    last sample. Otherwise calc_specgram() places the times of columns
+    evenly from the end of the first segment to the last sample.
+    """
+
+    def __init__(self,
+                 sample_rate=1,
+                 nseg=256,
+                 nstep=None,
+                 freq_bounds=None,
+                 extra_len=None,
+                 t_start=0,
+                 window='hamming'):
+        # pylint: disable=too-many-positional-arguments
+        if not nstep:
+            nstep = nseg // 2
+
+        self.sample_rate = sample_rate
+        self.nseg = nseg
+        self.nstep = nstep
+        self.t_start = t_start
+        self.window = window
+
+        self._fft_len = nseg
+        if extra_len:
+            self._fft_len = max(extra_len, nseg)
+
+        freqs = _freqs(self._fft_len, sample_rate)
+        self._ind = slice(None)
+        if freq_bounds:
+            self._ind = (freqs >= freq_bounds[0]) & (freqs <= freq_bounds[1])
+        self.freqs = freqs[self._ind]
+
+        self._segmenter = _Segmenter(nseg, nstep)
+
+    def reset(self):
+        """Forget the kept samples and start from t_start again."""
+        self._segmenter.reset()
+
+    def update(self, xdata):
+        """Add chunk of signal and calculate completed columns.
+
+        Parameters
+        ----------
+        xdata: array_like
+            Chunk of signal. Time is the last axis, the other axes
+            (channels) must be the same for all chunks.
+
+        Returns
+        -------
+        : np.ndarray
+            Columns of spectrogram. Frequencies and time are the last
+            two axes (as in calc_specgram()). The number of columns can
+            be zero.
+        : np.ndarray
+            Time values of columns.
+        """
+        first = self._segmenter.segs_total
+        segs = self._segmenter.push(xdata)
+        segs_total = segs.shape[-2]
+
+        t_new = self.t_start + (
+            (first + np.arange(segs_total)) * self.nstep
+            + self.nseg - 1) / self.sample_rate
+
+        if segs_total == 0:
+            specs = np.zeros(segs.shape[:-1] + (len(self.freqs), ))
+        else:
+            segs_faded = segs * _window_weights(self.window, self.nseg)
+            specs = 2 * abs(fftpack.fft(segs_faded, self._fft_len))
+            specs = specs[..., self._ind]
+
+        return np.swapaxes(specs, -1, -2), t_new
+
+    def flush(self):
+        """Pad kept samples with zeros and calculate last columns.
+
+        Signal is padded to the length multiple of nseg like in
+        calc_specgram(). The state is reset after flushing.
+
+        Returns
+        -------
+        : np.ndarray
+            Columns of spectrogram.
+        : np.ndarray
+            Time values of columns.
+        """
+        res = self.update(self._segmenter.padding())
+        self.reset()
+
+        return res
+
+    def columns(self, chunks, pad_end=False):
+        """Generate columns of spectrogram from iterable of chunks.
+
+        Parameters
+        ----------
+        chunks: iterable
+            Chunks of signal.
+        pad_end: bool
+            If True, the columns of padded end of signal are generated
+            after the last chunk (see flush()).
+
+        Yields
+        ------
+        : np.ndarray
+            Column of spectrogram (spectrum).
+        : float
+            Time of column.
+        """
+        for chunk in chunks:
+            yield from _split_columns(*self.update(chunk))
+
+        if pad_end:
+            yield from _split_columns(*self.flush())
+
+
+def welch(xdata,
+          sample_rate=1,
+          nseg=256,
+          nstep=None,
+          window='hamming',
+          nfft=None,
+          one_side=True,
+          axis=-1):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Return power spectral density estimated by Welch's method.
+
+    Parameters
+    ----------
+    xdata: array_like
+        Signal values
+    sample_rate: float
+        Sampling frequency (Hz)
+    nseg: int
+        Length of segment (in samples).
+    nstep: int
+        Optional. Length of step (in samples). If not setted then
+        equal to nseg // 2.
+    window: str
+        Window.
+    nfft: int
+        Length of the FFT. If None or less than nseg, the FFT length
+        is nseg.
+    one_side: bool
+        If True, the one-side PSD is calculated.
+    axis: int
+        Axis of time (default is -1). PSD is placed along the same
+        axis.
+
+    Returns
+    -------
+    : np.ndarray
+        Power spectral density (V**2/Hz if signal is measured in V).
+    : np.ndarray
+        Frequency values (Hz).
+    """
+    estimator = WelchEstimator(sample_rate=sample_rate,
+                               nseg=nseg,
+                               nstep=nstep,
+                               window=window,
+                               nfft=nfft,
+                               one_side=one_side)
+    estimator.update(np.moveaxis(np.asarray(xdata), axis, -1))
+
+    return np.moveaxis(estimator.psd(), -1, axis), estimator.freqs
+
+
+class WelchEstimator:
+    # pylint: disable=too-many-instance-attributes
+    """Welch's estimation of power spectral density updated by chunks.
+
+    Power of segments is accumulated in running sum, so the memory
+    does not depend on the length of signal. Chunks can have any
+    length, the samples of incomplete segment are kept between calls.
+
+    Parameters
+    ----------
+    sample_rate: float
+        Sampling frequency (Hz)
+    nseg: int
+        Length of segment (in samples).
+    nstep: int
+        Optional. Length of step (in samples). If not setted then
+        equal to nseg // 2.
+    window: str
+        Window.
+    nfft: int
+        Length of the FFT. If None or less than nseg, the FFT length
+        is nseg.
+    one_side: bool
+        If True, the one-side PSD is calculated.
+    batch: int
+        Maximal number of segments transformed at once.
+    """
+
+    def __init__(self,
+                 sample_rate=1,
+                 nseg=256,
+                 nstep=None,
+                 window='hamming',
+                 nfft=None,
+                 one_side=True,
+                 batch=BATCH_SIZE):
+        # pylint: disable=too-many-positional-arguments
+        if not nstep:
+            nstep = nseg // 2
+
+        self.nseg = nseg
+        self.one_side = one_side
+        self.batch = batch
+
+        self._fft_len = nseg
+        if nfft:
+            self._fft_len = max(nfft, nseg)
+
+        if one_side:
+            self.freqs = np.fft.rfftfreq(self._fft_len, 1 / sample_rate)
+        else:
+            self.freqs = _freqs(self._fft_len, sample_rate)
+
+        self._weights = _window_weights(window, nseg)
+        self._scale = 1 / (sample_rate * np.sum(self._weights**2))
+
+        self._segmenter = _Segmenter(nseg, nstep)
+        self._power = None
+
+    @property
+    def segs_total(self):
+        """Number of accumulated segments."""
+        return self._segmenter.segs_total
+
+    def reset(self):
+        """Forget the accumulated power and kept samples."""
+        self._segmenter.reset()
+        self._power = None
+
+    def update(self, xdata):
+        """Add chunk of signal.
+
+        Parameters
+        ----------
+        xdata: array_like
+            Chunk of signal. Time is the last axis, the other axes
+            (channels) must be the same for all chunks.
+        """
+        segs = self._segmenter.push(xdata)
+
+        if self._power is None:
+            self._power = np.zeros(segs.shape[:-2] + (len(self.freqs), ))
+
+        for start in range(0, segs.shape[-2], self.batch):
+            segs_faded = segs[..., start:start + self.batch, :] * self._weights
+            if self.one_side:
+                specs = np.fft.rfft(segs_faded, self._fft_len)
+            else:
+                specs = np.fft.fft(segs_faded, self._fft_len)
+            self._power += np.sum(specs.real**2 + specs.imag**2, axis=-2)
+
+    def psd(self):
+        """Return power spectral density of the signal added so far.
+
+        Returns
+        -------
+        : np.ndarray
+            Power spectral density. Zeros if no segment is complete.
+        """
+        if self._power is None:
+            return np.zeros(len(self.freqs))
+
+        res = self._power * self._scale / max(self.segs_total, 1)
+
+        if self.one_side:
+            last = None if self._fft_len % 2 else -1
+            res[..., 1:last] *= 2
+
+        return res
+
+
+def cache_info():
+    """Return statistics of caches of windows and frequencies.
+
+    Returns
+    -------
+    : dict
+        Keys are 'windows' and 'freqs', values are named tuples with
+        hits, misses, maxsize and currsize fields.
+    """
+    # pylint: disable=no-value-for-parameter
+    return {
+        'windows': _window_weights.cache_info(),
+        'freqs': _freqs.cache_info(),
+    }
+
+
+def cache_clear():
+    """Clear caches of windows and frequencies."""
+    _window_weights.cache_clear()
+    _freqs.cache_clear()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _window_weights(window, length):
+    """Return window normalized to keep the amplitude of signal."""
+    win = sig.get_window(window, length)
+    weights = win * len(win) / sum(win)
+    weights.flags.writeable = False
+
+    return weights
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _freqs(length, sample_rate):
+    """Return frequencies of FFT."""
+    freqs = np.fft.fftfreq(length, 1 / sample_rate)
+    freqs.flags.writeable = False
+
+    return freqs
+
+
+def _split_columns(specs, t_new):
+    """Yield columns of spectrogram with their time values."""
+    for i, t_col in enumerate(t_new):
+        yield specs[..., i], t_col
+
+
+def _fft_into(func, src, dst):
+    """Calculate FFT and put the result to dst."""
+    if _FFT_OUT:
+        func(src, out=dst)
+    else:
+        dst[:] = func(src)
@@ -35,7 +35,7 @@ DOCLINES = __doc__.split("\n")
 
 
 INSTALL_REQUIRES = [
-    'numpy>=1.14',
+    'numpy>=1.20',
     'scipy>=0.19',
     'jsonschema>=3.2',
 ]
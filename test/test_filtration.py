@@ -15,6 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
+import numpy as np
+import scipy.signal as sig
 from dsplab import filtration as flt
 
 
@@ -59,6 +61,43 @@ class TestHaarScaling(unittest.TestCase):
         self.assertEqual(t_new[0], 7)
 
 
+class TestHaarDecompose(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=1024)
+
+    def test_same_as_one_step(self):
+        x = self.x[:1000]
+        scl, details, levels_det = flt.haar_decompose(x, 3, denominator=3)
+        for det in levels_det:
+            x, det_ref, _ = flt.haar_one_step(x, np.arange(len(x)),
+                                              denominator=3)
+            self.assertTrue(np.array_equal(det, det_ref))
+        self.assertTrue(np.array_equal(scl, x))
+        self.assertTrue(np.array_equal(details,
+                                       np.concatenate(levels_det)))
+
+    def test_reconstruct(self):
+        scl, _, levels_det = flt.haar_decompose(self.x, 5)
+        self.assertTrue(np.allclose(flt.haar_reconstruct(scl, levels_det),
+                                    self.x))
+
+    def test_inplace(self):
+        scl_ref, _, levels_ref = flt.haar_decompose(self.x, 4)
+        buf = self.x.copy()
+        scl, details, levels_det = flt.haar_decompose(buf, 4, inplace=True)
+        self.assertIs(details, buf)
+        self.assertTrue(np.allclose(scl, scl_ref))
+        for det, det_ref in zip(levels_det, levels_ref):
+            self.assertTrue(np.allclose(det, det_ref))
+        res = flt.haar_reconstruct(scl, levels_det, out=buf)
+        self.assertIs(res, buf)
+        self.assertTrue(np.allclose(buf, self.x))
+
+    def test_inplace_len(self):
+        with self.assertRaises(ValueError):
+            flt.haar_decompose(self.x[:1000], 4, inplace=True)
+
+
 class TestOrder(unittest.TestCase):
     def test_find_butt_bandpass_order_1(self):
         band = (1.93, 2.14)
@@ -74,6 +113,44 @@ class TestOrder(unittest.TestCase):
         order = flt.find_butt_bandpass_order(band, fs)
         self.assertTrue(order > 5)
 
+    def test_same_as_impulse_response_fft(self):
+        for band in [(0.5, 1.0), (0.05, 0.1), (1.93, 2.14), (0.2, 1.8)]:
+            self.assertEqual(flt.find_butt_bandpass_order(band, 5),
+                             ref_butt_bandpass_order(band, 5))
+
+    def test_cache(self):
+        band = (1.1, 1.3)
+        order = flt.find_butt_bandpass_order(band, 7)
+        self.assertEqual(flt.find_butt_bandpass_order(list(band), 7.0),
+                         order)
+
+
+def ref_butt_bandpass_order(band, sample_rate):
+    """Search of order by FFT of impulse response of 2 hours."""
+    spectrum_len = round(60 * 120 * sample_rate)
+    unit_pulse = np.zeros(spectrum_len)
+    unit_pulse[1] = 1
+    ideal_fr = np.zeros(spectrum_len)
+    freqs = np.fft.fftfreq(spectrum_len, 1 / sample_rate)
+    ideal_fr[(freqs >= band[0]) & (freqs <= band[1])] = 1
+    ideal_fr = ideal_fr[:spectrum_len // 2]
+    wn = np.array(band) / (0.5 * sample_rate)
+    prev_metric = np.inf
+
+    for order in range(3, 21):
+        b, a = sig.butter(order, wn, btype='band')
+        impulse_response = sig.lfilter(b, a, unit_pulse)
+        real_fr = abs(np.fft.fft(impulse_response))[:spectrum_len // 2]
+        with np.errstate(all='ignore'):
+            metric = np.sum((real_fr - ideal_fr)**2)**0.5
+        best_order = order
+        if (np.isnan(metric)) or (metric >= prev_metric):
+            best_order -= 1
+            break
+        prev_metric = metric
+
+    return best_order - 1
+
 
 class TestStupidFilters(unittest.TestCase):
     def test_stupid_lowpass_filter_just_run(self):
@@ -92,3 +169,178 @@ class TestTrend(unittest.TestCase):
         x = [1, 2, 3, 4, 5, 6, 7, 8]
         flt.trend_smooth(x)
         self.assertTrue(True)
+
+
+class TestChannels(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.xs = rng.normal(size=(3, 500))
+
+    def check(self, func, **kwargs):
+        res = func(self.xs, **kwargs)
+        res_tr = func(self.xs.T, axis=0, **kwargs)
+        for x, r in zip(self.xs, res):
+            self.assertTrue(np.allclose(func(x, **kwargs), r))
+        self.assertTrue(np.allclose(res, res_tr.T))
+
+    def test_butter_filter(self):
+        self.check(flt.butter_filter, sample_rate=50, freqs=[5.0, 10.0],
+                   order=4)
+
+    def test_butter_filter_chunks(self):
+        ys = flt.butter_filter(self.xs, 50, [5.0, 10.0], 3, chunk_len=77)
+        ys_ref = flt.butter_filter(self.xs, 50, [5.0, 10.0], 3)
+        self.assertTrue(np.allclose(ys, ys_ref))
+
+    def test_stupid_lowpass_filter(self):
+        self.check(flt.stupid_lowpass_filter, sample_rate=50, cutoff=5)
+
+    def test_stupid_bandpass_filter(self):
+        self.check(flt.stupid_bandpass_filter, sample_rate=50,
+                   bandpass=(5, 10))
+
+    def test_smooth(self):
+        self.check(flt.smooth, ntaps=5)
+
+    def test_trend_smooth(self):
+        trend_xs, trend_ts = flt.trend_smooth(self.xs, cut_off=0.1)
+        self.assertEqual(trend_xs.shape, (3, 495))
+        self.assertEqual(len(trend_ts), 495)
+
+
+class TestBlockFilter(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=(2, 3000))
+
+    def test_same_as_convolution(self):
+        filt = flt.BlockFilter(100, (5, 20), 101)
+        y_ref = [np.convolve(x, filt.taps)[50:3050] for x in self.x]
+        for chunk_len in [None, 1, 7, 500]:
+            y = flt.block_filter(self.x, 100, (5, 20), 101,
+                                 chunk_len=chunk_len)
+            self.assertTrue(np.allclose(y, y_ref))
+
+    def test_stream(self):
+        filt = flt.BlockFilter(100, (0, 10), 51, nfft=64)
+        y_ref = filt(self.x)
+        filt.reset()
+        y = np.concatenate([filt(self.x[:, start:start + 333])
+                            for start in range(0, 3000, 333)], axis=-1)
+        self.assertTrue(np.allclose(y, y_ref))
+
+    def test_many_batches(self):
+        x = np.random.default_rng(1).normal(size=10000)
+        filt = flt.BlockFilter(100, (5, 20), 51, nfft=64)
+        y_ref = np.convolve(x, filt.taps)[:10000]
+        self.assertTrue(np.allclose(filt(x), y_ref))
+
+    def test_lowpass(self):
+        t = np.arange(3000) / 100
+        x = np.sin(2 * np.pi * t) + np.sin(2 * np.pi * 20 * t)
+        y = flt.stupid_lowpass_filter(x, 100, 5, ntaps=201)
+        self.assertTrue(np.allclose(y[200:-200],
+                                    np.sin(2 * np.pi * t)[200:-200],
+                                    atol=1e-2))
+
+    def test_bandpass_channels(self):
+        y = flt.stupid_bandpass_filter(self.x, 100, (5, 20), ntaps=101)
+        y_tr = flt.stupid_bandpass_filter(self.x.T, 100, (5, 20), axis=0,
+                                          ntaps=101)
+        self.assertTrue(np.allclose(y, y_tr.T))
+        y_ch = flt.stupid_bandpass_filter(self.x, 100, (5, 20), ntaps=101,
+                                          chunk_len=128)
+        self.assertTrue(np.allclose(y, y_ch))
+
+    def test_even_ntaps(self):
+        with self.assertRaises(ValueError):
+            flt.BlockFilter(100, (5, 20), 100)
+
+
+class TestButter(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=(2, 2000))
+
+    def test_same_as_ba(self):
+        b, a = sig.butter(4, [0.2, 0.4], btype='band')
+        y = flt.butter_filter(self.x, 50, [5, 10], 4)
+        self.assertTrue(np.allclose(y, sig.lfilter(b, a, self.x)))
+
+    def test_high_order_is_stable(self):
+        y = flt.butter_filter(self.x, 1000, [10, 12], 16)
+        self.assertTrue(np.all(np.isfinite(y)))
+        self.assertLess(np.std(y), np.std(self.x))
+
+    def test_lowpass(self):
+        b, a = sig.butter(3, 0.2)
+        y = flt.butter_filter(self.x, 50, 5, 3, btype='lowpass')
+        self.assertTrue(np.allclose(y, sig.lfilter(b, a, self.x)))
+
+    def test_zero_phase(self):
+        y = flt.butter_filter(self.x, 50, [5, 10], 4, zero_phase=True)
+        sos = sig.butter(4, [0.2, 0.4], btype='band', output='sos')
+        self.assertTrue(np.allclose(y, sig.sosfiltfilt(sos, self.x)))
+        with self.assertRaises(ValueError):
+            flt.butter_filter(self.x, 50, [5, 10], 4, zero_phase=True,
+                              chunk_len=100)
+
+    def test_stateful(self):
+        y_ref = flt.butter_filter(self.x, 50, [5, 10], 4)
+        filt = flt.ButterFilter(50, [5, 10], 4)
+        y = np.concatenate([filt(self.x[:, start:start + 333])
+                            for start in range(0, 2000, 333)], axis=-1)
+        self.assertTrue(np.allclose(y, y_ref))
+
+    def test_design_cache(self):
+        sos_1 = flt.butter_sos(50, [5, 10], 4)
+        sos_2 = flt.butter_sos(100, [10.0, 20.0], 4)
+        self.assertTrue(np.array_equal(sos_1, sos_2))
+        sos_1[0, 0] = 0
+        sos_3 = flt.butter_sos(50, [5, 10], 4)
+        self.assertTrue(np.array_equal(sos_3, sos_2))
+
+
+class TestStreamingSmooth(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=(2, 1000))
+        self.t = np.arange(1000) / 50
+
+    def chunks(self, data, size):
+        return [data[..., start:start + size]
+                for start in range(0, data.shape[-1], size)]
+
+    def test_smoother(self):
+        for ntaps, cut in [(3, True), (1, True), (20, False), (51, True)]:
+            y_ref = flt.smooth(self.x, ntaps, cut=cut)
+            for size in [1, 7, 1000]:
+                smoother = flt.Smoother(ntaps, cut=cut)
+                y = np.concatenate([smoother(chunk)
+                                    for chunk in self.chunks(self.x, size)],
+                                   axis=-1)
+                self.assertTrue(np.allclose(y, y_ref))
+
+    def test_trend_tracker(self):
+        x_ref, t_ref = flt.trend_smooth(self.x[0], tdata=self.t, cut_off=2)
+        for size in [3, 100]:
+            tracker = flt.TrendTracker(50, cut_off=2)
+            res = [tracker(x, t) for x, t in zip(self.chunks(self.x[0], size),
+                                                 self.chunks(self.t, size))]
+            x_trend = np.concatenate([r[0] for r in res])
+            t_trend = np.concatenate([r[1] for r in res])
+            self.assertTrue(np.allclose(x_trend, x_ref))
+            self.assertTrue(np.array_equal(t_trend, t_ref))
+
+    def test_trend_tracker_time(self):
+        tracker = flt.TrendTracker(50, cut_off=2, t_start=1)
+        t_ref = flt.trend_smooth(self.x[0], tdata=self.t + 1, cut_off=2)[1]
+        t = np.concatenate([tracker(x)[1] for x in self.chunks(self.x[0], 9)])
+        self.assertTrue(np.allclose(t, t_ref))
+
+    def test_trend_tracker_no_time(self):
+        tracker = flt.TrendTracker(50, cut_off=2)
+        x_ref, t_ref = flt.trend_smooth(self.x[0], sample_rate=50, cut_off=2)
+        res = [tracker(x) for x in self.chunks(self.x[0], 9)]
+        self.assertTrue(np.allclose(np.concatenate([r[0] for r in res]),
+                                    x_ref))
+        self.assertTrue(np.allclose(np.concatenate([r[1] for r in res]),
+                                    t_ref))
+        self.assertAlmostEqual(t_ref[0], 12 / 50)
@@ -1,5 +1,8 @@
 from unittest import TestCase
+from collections import deque
+import numpy as np
 from dsplab.flow import online
+from dsplab.flow.plan import WorkNode, PassNode, Plan
 
 
 class TestQueueFilter(TestCase):
@@ -16,12 +19,280 @@ class TestAnd(TestCase):
     def test_touch(self):
         online.And()
 
+    def test_scalars(self):
+        self.assertEqual(online.And()([1, 1, 0]), 0)
+        self.assertEqual(online.And()([1, 1, 1]), 1)
+        self.assertAlmostEqual(online.And()([0.5, 0.4]), 0.2)
+
+    def test_channels(self):
+        xs = np.array([[1, 0, 1, 0], [1, 1, 0, 0]])
+        self.assertTrue(np.array_equal(online.And()(xs), [1, 0, 0, 0]))
+        self.assertTrue(np.array_equal(online.And()(*xs), [1, 0, 0, 0]))
+
+    def test_mixed_scalar_and_vector(self):
+        vec = np.array([1., 0., 1.])
+        self.assertTrue(np.array_equal(online.And()([vec, 1]), vec))
+        self.assertTrue(np.array_equal(online.And()(vec, 0.5), vec / 2))
+        self.assertTrue(np.array_equal(online.Or()(vec, 0), vec))
+        self.assertTrue(np.array_equal(online.Or()([1, vec]), [1, 1, 1]))
+
 
 class TestOr(TestCase):
     def test_touch(self):
         online.Or()
 
+    def test_same_as_loop(self):
+        xs = np.random.default_rng(0).random((3, 10, 4))
+        ys_ref = np.zeros((10, 4))
+        for x in xs:
+            ys_ref += x * (1 - ys_ref)
+        self.assertTrue(np.allclose(online.Or()(xs), ys_ref))
+        self.assertEqual(online.Or()([0, 1, 0]), 1)
+        self.assertEqual(online.Or()([0, 0, 0]), 0)
+
+
+class TestNot(TestCase):
+    def test_not(self):
+        self.assertTrue(np.array_equal(online.Not()([1, 0, 0.25]),
+                                       [0, 1, 0.75]))
+
+
+class TestThreshold(TestCase):
+    def test_threshold(self):
+        xs = np.array([[0, 2], [3, 1]])
+        self.assertTrue(np.array_equal(online.Threshold([1, 2])(xs),
+                                       [[0, 0], [1, 0]]))
+        self.assertTrue(np.array_equal(online.Threshold(1, False)(xs),
+                                       [[1, 0], [0, 0]]))
+
+
+class TestHysteresis(TestCase):
+    def test_switching(self):
+        hyst = online.Hysteresis(-1, 1)
+        ys = [hyst(x) for x in [0, 2, 0, -0.5, -2, 0, 1, 1.5]]
+        self.assertEqual(ys, [0, 1, 1, 1, 0, 0, 0, 1])
+
+    def test_bad_thresholds(self):
+        with self.assertRaises(ValueError):
+            online.Hysteresis(1, -1)
+
+    def test_block_same_as_loop(self):
+        xs = np.random.default_rng(0).normal(size=(100, 6))
+        hyst = online.Hysteresis(-0.5, [0.5] * 6, init=[0, 1] * 3)
+        ys_ref = [hyst(x) for x in xs]
+        hyst = online.Hysteresis(-0.5, [0.5] * 6, init=[0, 1] * 3)
+        ys = np.concatenate([hyst.process_block(xs[start:start + size])
+                             for start, size in [(0, 1), (1, 0), (1, 30),
+                                                 (31, 69)]])
+        self.assertTrue(np.array_equal(ys, ys_ref))
+        hyst.reset()
+        self.assertTrue(np.array_equal(hyst.process_block(xs), ys_ref))
+
+
+class TestLogicPlan(TestCase):
+    def test_quick_run(self):
+        rng = np.random.default_rng(0)
+        levels = PassNode()
+        noises = PassNode()
+        alarm = WorkNode(online.Hysteresis(1, 2), inputs=[levels])
+        quiet = WorkNode(online.Threshold(0.5, above=False),
+                         inputs=[noises])
+        res = WorkNode(online.And(), inputs=[alarm, quiet])
+        plan = Plan(quick=True)
+        plan.add_nodes([levels, noises, alarm, quiet, res])
+        plan.inputs = [levels, noises]
+        plan.outputs = [res]
+
+        hyst = online.Hysteresis(1, 2)
+        for _ in range(20):
+            xs = 3 * rng.random(300)
+            ns = rng.random(300)
+            ys_ref = hyst(xs) * (ns < 0.5)
+            self.assertTrue(np.array_equal(plan([xs, ns])[0], ys_ref))
+
 
 class TestOnlineFilter(TestCase):
     def test_touch(self):
         online.OnlineFilter()
+
+
+class Mean(online.QueueFilter):
+    def proc_queue(self):
+        return np.mean(self.queue.values)
+
+
+class SmoothedMean(online.OnlineFilter):
+    def proc_queue(self):
+        return np.mean(self.queue.values)
+
+
+class FastMean(SmoothedMean):
+    def proc_windows(self, windows):
+        return np.mean(windows, axis=1)
+
+
+class Square(online.OnlineFilter):
+    def proc_sample(self, sample):
+        return sample**2
+
+
+class FastSquare(Square):
+    def proc_samples(self, samples):
+        return samples**2
+
+
+class TestRingBuffer(TestCase):
+    def test_same_as_deque(self):
+        ring = online.RingBuffer(5, fill_with=-1)
+        queue = deque([-1] * 5, maxlen=5)
+        for sample in range(17):
+            ring.append(sample)
+            queue.append(sample)
+            self.assertEqual(list(ring), list(queue))
+            self.assertEqual(ring[0], queue[0])
+            self.assertEqual(ring[-1], queue[-1])
+
+    def test_values_are_view(self):
+        ring = online.RingBuffer(4)
+        for sample in range(6):
+            ring.append(sample)
+        values = ring.values
+        self.assertTrue(values.flags.c_contiguous)
+        self.assertFalse(values.flags.owndata)
+        self.assertFalse(values.flags.writeable)
+        self.assertTrue(np.array_equal(np.array(ring), [2, 3, 4, 5]))
+
+    def test_vector_samples(self):
+        ring = online.RingBuffer(3, fill_with=np.zeros(2))
+        ring.append([1, 2])
+        self.assertEqual(ring.values.shape, (3, 2))
+        self.assertTrue(np.array_equal(ring[-1], [1, 2]))
+
+    def test_complex_samples(self):
+        delayer = online.Delayer(2)
+        ys = [delayer(x) for x in [1 + 2j, 3, 4j]]
+        self.assertEqual(ys, [0, 1 + 2j, 3])
+        ring = online.RingBuffer(2)
+        ring.extend([1j, 2j])
+        self.assertEqual(list(ring), [1j, 2j])
+
+    def test_vector_samples_default_fill(self):
+        delayer = online.Delayer(2)
+        ys = [delayer(x) for x in [[1, 2], [3, 4], [5, 6]]]
+        self.assertTrue(np.array_equal(ys, [[0, 0], [1, 2], [3, 4]]))
+
+    def test_object_samples(self):
+        delayer = online.Delayer(2)
+        ys = [delayer(x) for x in ['a', 'bb', None, (1, 2)]]
+        self.assertEqual(ys, [0, 'a', 'bb', None])
+        ring = online.RingBuffer(2, fill_with=np.zeros(3))
+        for sample in [np.ones(3), [1, 2], 'c']:
+            ring.append(sample)
+        self.assertEqual(ring[-2], [1, 2])
+        self.assertEqual(ring[-1], 'c')
+
+    def test_extend(self):
+        for num in [0, 2, 5, 9]:
+            ring = online.RingBuffer(5, fill_with=-1)
+            queue = deque([-1] * 5, maxlen=5)
+            for start in range(0, 30, num or 1):
+                ring.extend(np.arange(start, start + num))
+                queue.extend(range(start, start + num))
+                self.assertEqual(list(ring), list(queue))
+
+    def test_windows(self):
+        ring = online.RingBuffer(3)
+        ring.extend([1, 2])
+        windows = ring.windows([3, 4])
+        self.assertTrue(np.array_equal(windows, [[1, 2, 3], [2, 3, 4]]))
+        self.assertTrue(np.array_equal(ring.values, [0, 1, 2]))
+
+
+class TestQueues(TestCase):
+    def setUp(self):
+        self.xs = np.random.default_rng(0).normal(size=50)
+
+    def test_delayer(self):
+        delayer = online.Delayer(3)
+        ys = [delayer(x) for x in self.xs]
+        self.assertTrue(np.array_equal(ys[2:], self.xs[:-2]))
+
+    def test_queue_filter(self):
+        mean = Mean(4)
+        ys = [mean(x) for x in self.xs]
+        ys_ref = np.convolve(self.xs, np.ones(4) / 4)[:50]
+        self.assertTrue(np.allclose(ys, ys_ref))
+
+    def test_online_filter(self):
+        filt = SmoothedMean(ntaps=4, smooth_ntaps=5, step=2)
+        ys = [filt(x) for x in self.xs]
+        self.assertTrue(all(y is None for y in ys[::2]))
+        means = np.convolve(self.xs, np.ones(4) / 4)[:50][1::2]
+        wind = np.hamming(5) / sum(np.hamming(5))
+        ys_ref = np.convolve(means, wind[::-1])[:len(means)]
+        self.assertTrue(np.allclose(ys[1::2], ys_ref))
+
+
+def by_blocks(filt, xs, sizes):
+    ys = []
+    start = 0
+    for size in sizes:
+        ys.extend(filt.process_block(xs[start:start + size]))
+        start += size
+    ys.extend(filt.process_block(xs[start:]))
+    return np.array(ys)
+
+
+class TestProcessBlock(TestCase):
+    def setUp(self):
+        self.xs = np.random.default_rng(0).normal(size=200)
+        self.sizes = [1, 7, 0, 3, 64, 2]
+
+    def check(self, cls, exact, **kwargs):
+        filt = cls(**kwargs)
+        ys_ref = [filt(x) for x in self.xs]
+        ys_ref = [y for y in ys_ref if y is not None]
+        ys = by_blocks(cls(**kwargs), self.xs, self.sizes)
+        self.assertEqual(len(ys), len(ys_ref))
+        if exact:
+            self.assertTrue(np.array_equal(ys, ys_ref))
+        else:
+            self.assertTrue(np.allclose(ys, ys_ref, rtol=0, atol=1e-12))
+
+    def test_queue_filter(self):
+        for cls in [Mean, online.Delayer]:
+            filt = cls(4)
+            ys_ref = [filt(x) for x in self.xs]
+            ys = by_blocks(cls(4), self.xs, self.sizes)
+            self.assertTrue(np.array_equal(ys, ys_ref))
+
+    def test_only_queue(self):
+        for step in [1, 3]:
+            self.check(SmoothedMean, True, ntaps=4, step=step)
+            self.check(FastMean, False, ntaps=4, step=step)
+
+    def test_full(self):
+        for step in [1, 3]:
+            self.check(SmoothedMean, True, ntaps=4, smooth_ntaps=5,
+                       step=step)
+            self.check(FastMean, False, ntaps=4, smooth_ntaps=5, step=step)
+
+    def test_simple(self):
+        for step in [1, 3]:
+            self.check(Square, True, step=step)
+            self.check(FastSquare, True, step=step)
+
+    def test_only_smooth(self):
+        for step in [1, 3]:
+            self.check(Square, True, smooth_ntaps=5, step=step)
+            self.check(FastSquare, False, smooth_ntaps=5, step=step)
+
+    def test_state_is_kept(self):
+        filt = FastMean(ntaps=4, smooth_ntaps=5, step=3)
+        by_blocks(filt, self.xs[:100], [5, 11])
+        ys = [filt(x) for x in self.xs[100:]]
+        filt_ref = SmoothedMean(ntaps=4, smooth_ntaps=5, step=3)
+        ys_ref = [filt_ref(x) for x in self.xs]
+        self.assertTrue(np.allclose([y for y in ys if y is not None],
+                                    [y for y in ys_ref[100:]
+                                     if y is not None]))
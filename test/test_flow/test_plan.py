@@ -15,7 +15,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
-from dsplab.flow.plan import Node
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dsplab.flow.activity import Work
+from copy import copy, deepcopy
+from dsplab.flow.plan import Node, WorkNode, MapNode, PassNode, Plan
 from dsplab.flow.plan import get_plan_from_dict
 
 
@@ -25,6 +28,14 @@ class TestNode(unittest.TestCase):
         n.result_info = "Signal"
         self.assertEqual(n.result_info, "Signal")
 
+    def test_copy_keeps_inputs(self):
+        a = Node()
+        b = Node(inputs=[a])
+        b.set_start_hook(print)
+        for node in [copy(b), deepcopy(b)]:
+            self.assertEqual(len(node.inputs), 1)
+            self.assertIsNotNone(node._start_hook)
+
 
 class Test_get_plan_from_dict(unittest.TestCase):
     def test_empty(self):
@@ -79,3 +90,277 @@ class Test_get_plan_from_dict(unittest.TestCase):
         }
         plan = get_plan_from_dict(plan_dict)
         self.assertEqual(plan.get_outputs()[0].get_result_info(), 'my result')
+
+
+def inc(x):
+    return x + 1
+
+
+def plus(x1, x2):
+    return x1 + x2
+
+
+class TestPlanRun(unittest.TestCase):
+    def test_chain(self):
+        nodes = [WorkNode(Work(worker=inc)) for _ in range(5)]
+        plan = Plan()
+        plan.add_node(nodes[0])
+        for prev, node in zip(nodes[:-1], nodes[1:]):
+            plan.add_node(node, inputs=[prev])
+        plan.inputs = [nodes[0]]
+        plan.outputs = [nodes[-1]]
+        self.assertEqual(plan([0]), [5])
+
+    def test_chain_added_in_reversed_order(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[a])
+        c = WorkNode(Work(worker=inc), inputs=[b])
+        plan = Plan()
+        plan.add_node(c)
+        plan.add_node(b)
+        plan.add_node(a)
+        plan.inputs = [a]
+        plan.outputs = [c]
+        self.assertEqual(plan([0]), [3])
+
+    def test_generator(self):
+        g = WorkNode(Work(worker=lambda: 10))
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=plus))
+        plan = Plan()
+        plan.add_node(g)
+        plan.add_node(a)
+        plan.add_node(b, inputs=[g, a])
+        plan.inputs = [a]
+        plan.outputs = [b]
+        self.assertEqual(plan([1]), [12])
+
+    def test_hooks_order_and_progress(self):
+        log = []
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc))
+        c = WorkNode(Work(worker=plus))
+        for name, node in zip('abc', [a, b, c]):
+            node.set_start_hook(log.append, 'start ' + name)
+            node.set_stop_hook(log.append, 'stop ' + name)
+        plan = Plan()
+        plan.add_node(c, inputs=[a, b])
+        plan.add_node(b, inputs=[a])
+        plan.add_node(a)
+        plan.set_progress_hook(lambda: log.append('progress'))
+        plan.inputs = [a]
+        plan.outputs = [c]
+        self.assertEqual(plan([1]), [5])
+        self.assertEqual(log, [
+            'start a', 'stop a', 'progress',
+            'start b', 'stop b', 'progress',
+            'start c', 'stop c', 'progress',
+        ])
+
+    def test_node_with_unknown_input_is_skipped(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[WorkNode()])
+        plan = Plan()
+        plan.add_node(a)
+        plan.add_node(b)
+        plan.inputs = [a]
+        plan.outputs = [a, b]
+        self.assertEqual(plan([1]), [2, None])
+
+    def test_run_and_quick_run_are_equal(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[a])
+        c = WorkNode(Work(worker=plus), inputs=[a, b])
+        plan = Plan()
+        plan.add_node(a)
+        plan.add_node(b)
+        plan.add_node(c)
+        plan.inputs = [a]
+        plan.outputs = [c]
+        res = plan([1])
+        plan.set_quick()
+        self.assertEqual(plan([1]), res)
+
+
+class TestPlanStructure(unittest.TestCase):
+    def test_remove_node_with_dependents(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc))
+        c = WorkNode(Work(worker=inc))
+        plan = Plan()
+        plan.add_node(a)
+        plan.add_node(b, inputs=[a])
+        plan.add_node(c, inputs=[a, b])
+        plan.remove_node(a)
+        self.assertEqual(b.inputs, [])
+        self.assertEqual(c.inputs, [b])
+        self.assertEqual(plan.get_nodes(), [b, c])
+        with self.assertRaises(RuntimeError):
+            plan.remove_node(a)
+
+    def test_remove_unknown_input_makes_node_ready(self):
+        foreign = WorkNode()
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[a, foreign])
+        plan = Plan()
+        plan.add_node(a)
+        plan.add_node(b)
+        plan.add_node(foreign)
+        plan.inputs = [a]
+        plan.outputs = [b]
+        plan.remove_node(foreign)
+        self.assertEqual(plan([1]), [3])
+
+    def test_remove_not_ready_node_makes_dependent_ready(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[WorkNode()])
+        c = WorkNode(Work(worker=inc), inputs=[a, b])
+        plan = Plan()
+        plan.add_node(a)
+        plan.add_node(b)
+        plan.add_node(c)
+        plan.inputs = [a]
+        plan.outputs = [c]
+        plan.remove_node(b)
+        self.assertEqual(plan([1]), [3])
+
+    def test_remove_node_with_itself_as_input(self):
+        calls = []
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=lambda *args: calls.append(args)))
+        b.inputs = [b, a]
+        plan = Plan()
+        plan.add_node(a)
+        plan.add_node(b)
+        plan.inputs = [a]
+        plan.outputs = [a]
+        plan.remove_node(b)
+        self.assertEqual(plan.get_nodes(), [a])
+        self.assertEqual(plan([1]), [2])
+        self.assertEqual(calls, [])
+
+    def test_add_nodes(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[a])
+        c = WorkNode(Work(worker=plus), inputs=[a, b])
+        plan = Plan()
+        plan.add_nodes([c, b, a])
+        plan.inputs = [a]
+        plan.outputs = [c]
+        self.assertEqual(plan.get_nodes(), [c, b, a])
+        self.assertEqual(plan([1]), [5])
+
+    def test_add_node_again_with_new_inputs(self):
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc))
+        c = WorkNode(Work(worker=plus), inputs=[a, a])
+        plan = Plan()
+        plan.add_nodes([a, b, c])
+        plan.add_node(c, inputs=[a, b])
+        plan.inputs = [a, b]
+        plan.outputs = [c]
+        self.assertEqual(plan([1, 10]), [13])
+
+    def test_clear(self):
+        a = WorkNode(Work(worker=inc))
+        plan = Plan()
+        plan.add_node(a)
+        plan.inputs = [a]
+        plan.outputs = [a]
+        plan.clear()
+        self.assertEqual(plan.get_nodes(), [])
+        self.assertEqual(plan([1]), [])
+
+    def test_get_plan_from_dict_reversed_order(self):
+        plan_dict = {
+            'nodes': [
+                {
+                    'id': 'c',
+                    'inputs': ['b'],
+                    'work': {'worker': {'function': __name__ + '.inc'}},
+                },
+                {
+                    'id': 'b',
+                    'inputs': ['a'],
+                    'work': {'worker': {'function': __name__ + '.inc'}},
+                },
+                {
+                    'id': 'a',
+                    'work': {'worker': {'function': __name__ + '.inc'}},
+                },
+            ],
+            'inputs': ['a'],
+            'outputs': ['c'],
+        }
+        plan = get_plan_from_dict(plan_dict)
+        self.assertEqual(plan([0]), [3])
+
+
+def get_fan_plan(executor=None):
+    a = WorkNode(Work(worker=inc))
+    branches = [WorkNode(Work(worker=inc), inputs=[a]) for _ in range(4)]
+    g = WorkNode(Work(worker=gen))
+    b = WorkNode(Work(worker=plus), inputs=branches[:2])
+    c = WorkNode(Work(worker=plus), inputs=[b, g])
+    plan = Plan(executor=executor)
+    plan.add_nodes([c, b, g, *branches, a])
+    plan.inputs = [a]
+    plan.outputs = [c, *branches]
+    return plan
+
+
+def gen():
+    return 10
+
+
+def get_map_plan(executor=None):
+    a = PassNode()
+    b = MapNode(Work(worker=inc), inputs=[a])
+    plan = Plan(executor=executor)
+    plan.add_nodes([a, b])
+    plan.inputs = [a]
+    plan.outputs = [b]
+    return plan
+
+
+class TestPlanParallelRun(unittest.TestCase):
+    def test_thread_pool(self):
+        res = get_fan_plan()([1])
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            plan = get_fan_plan(executor)
+            self.assertEqual(plan([1]), res)
+            self.assertEqual(plan([2]), [18, 4, 4, 4, 4])
+
+    def test_process_pool(self):
+        res = get_fan_plan()([1])
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            plan = get_fan_plan(executor)
+            self.assertEqual(plan([1]), res)
+            plan = get_map_plan(executor)
+            self.assertEqual(plan([[1, 2, 3]]), [[2, 3, 4]])
+
+    def test_hooks(self):
+        log = []
+        a = WorkNode(Work(worker=inc))
+        b = WorkNode(Work(worker=inc), inputs=[a])
+        for name, node in zip('ab', [a, b]):
+            node.set_start_hook(log.append, 'start ' + name)
+            node.set_stop_hook(log.append, 'stop ' + name)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            plan = Plan()
+            plan.executor = executor
+            plan.add_nodes([a, b])
+            plan.set_progress_hook(lambda: log.append('progress'))
+            plan.inputs = [a]
+            plan.outputs = [b]
+            self.assertEqual(plan([1]), [3])
+        self.assertEqual(log, [
+            'start a', 'stop a', 'progress',
+            'start b', 'stop b', 'progress',
+        ])
+
+    def test_executor_off(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            plan = get_fan_plan(executor)
+        plan.executor = None
+        self.assertEqual(plan([1]), [16, 3, 3, 3, 3])
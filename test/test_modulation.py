@@ -15,7 +15,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
+from itertools import islice
+from math import cos
 import numpy as np
+import scipy.signal as sig
 from dsplab import modulation as mod
 
 
@@ -97,6 +100,101 @@ class Test_freq_amp_mod(unittest.TestCase):
         self.assertEqual(len(ts), 50)
 
 
+class TestVectorized(unittest.TestCase):
+    def test_harm(self):
+        res = mod.harm(10, 50, 2, 1.5, phi=0.3)
+        res_v = mod.harm(10, 50, 2, 1.5, phi=0.3, vectorized=True)
+        for r, r_v in zip(res, res_v):
+            self.assertTrue(np.allclose(r, r_v))
+
+    def test_amp_mod(self):
+        res = mod.amp_mod(10, 50, lambda t: 1 + 0.1 * t, 2, phi=0.3)
+        res_v = mod.amp_mod(10, 50, lambda t: 1 + 0.1 * t, 2, phi=0.3,
+                            vectorized=True)
+        for r, r_v in zip(res, res_v):
+            self.assertTrue(np.allclose(r, r_v))
+
+    def test_freq_mod(self):
+        res = mod.freq_mod(10, 50, 2, lambda t: 5 + np.sin(t), phi=0.3)
+        res_v = mod.freq_mod(10, 50, 2, lambda t: 5 + np.sin(t), phi=0.3,
+                             vectorized=True)
+        self.assertTrue(np.array_equal(res[1], res_v[1]))
+        for r, r_v in zip(res, res_v):
+            self.assertTrue(np.allclose(r, r_v))
+
+    def test_phase_mod(self):
+        res = mod.phase_mod(10, 50, 2, 3, lambda t: np.cos(t))
+        res_v = mod.phase_mod(10, 50, 2, 3, lambda t: np.cos(t),
+                              vectorized=True)
+        for r, r_v in zip(res, res_v):
+            self.assertTrue(np.allclose(r, r_v))
+
+    def test_freq_amp_mod(self):
+        res = mod.freq_amp_mod(10, 50, lambda t: t, lambda t: 5)
+        res_v = mod.freq_amp_mod(10, 50, lambda t: t, lambda t: 5,
+                                 vectorized=True)
+        for r, r_v in zip(res, res_v):
+            self.assertTrue(np.allclose(r, r_v))
+
+    def test_not_array_aware_func(self):
+        def func(t):
+            return 1 if t < 0.5 else cos(t)
+
+        res = mod.amp_mod(1, 50, func, 2)
+        res_v = mod.amp_mod(1, 50, func, 2, vectorized=True)
+        self.assertTrue(np.allclose(res[0], res_v[0]))
+
+    def test_noise_no_args(self):
+        xs = mod.freq_mod(1, 50, 1, lambda t: 10, noise_amp=lambda: 1,
+                          vectorized=True)[0]
+        self.assertEqual(max(xs), 2)
+
+    def test_noise_bulk(self):
+        xs = mod.harm(1, 50, 1, 1, noise_amp=np.ones, vectorized=True)[0]
+        self.assertAlmostEqual(max(xs), 2)
+        self.assertAlmostEqual(min(xs), -2)
+
+    def test_noise_optional_argument(self):
+        np.random.seed(0)
+        xs = mod.harm(1, 100, 1, 1, noise_amp=np.random.normal,
+                      vectorized=True)[0]
+        self.assertLess(max(abs(xs)), 10)
+
+    def test_empty(self):
+        xs, phs, ts = mod.freq_mod(0, 50, 1, lambda t: 10, vectorized=True)
+        self.assertEqual(len(xs) + len(phs) + len(ts), 0)
+
+
+class TestBlocks(unittest.TestCase):
+    def test_amp_mod_blocks(self):
+        xs, ts = mod.amp_mod(10, 50, lambda t: 1 + 0.1 * t, 2, phi=0.3)
+        blocks = list(mod.amp_mod_blocks(10, 50, lambda t: 1 + 0.1 * t, 2,
+                                         phi=0.3, block_len=64))
+        self.assertEqual([len(b[0]) for b in blocks], [64] * 7 + [52])
+        self.assertTrue(np.allclose(np.concatenate([b[0] for b in blocks]),
+                                    xs))
+        self.assertTrue(np.array_equal(np.concatenate([b[1] for b in blocks]),
+                                       ts))
+
+    def test_freq_mod_blocks(self):
+        res = mod.freq_mod(10, 50, 2, lambda t: 5 + np.sin(t), phi=0.3,
+                           vectorized=True)
+        blocks = list(mod.freq_mod_blocks(10, 50, 2, lambda t: 5 + np.sin(t),
+                                          phi=0.3, block_len=100))
+        self.assertEqual(len(blocks), 5)
+        for i in range(3):
+            self.assertTrue(np.array_equal(
+                np.concatenate([b[i] for b in blocks]), res[i]))
+
+    def test_endless(self):
+        blocks = islice(mod.freq_mod_blocks(None, 50, 1, lambda t: 1,
+                                            block_len=10), 1000)
+        self.assertEqual(sum(len(b[0]) for b in blocks), 10000)
+
+    def test_empty(self):
+        self.assertEqual(list(mod.amp_mod_blocks(0, 50, lambda t: 1, 1)), [])
+
+
 class Test_envelope_by_extremums(unittest.TestCase):
     def test_result_len(self):
         x = np.array([0, 1, 0, -1, 0, 1, 0, -1, 0, 1, 0])
@@ -104,6 +202,48 @@ class Test_envelope_by_extremums(unittest.TestCase):
         self.assertEqual(len(e) + len(t), 5 + 5)
 
 
+class TestIqDemodulator(unittest.TestCase):
+    def setUp(self):
+        rate = 1000
+        xs, _, self.ts = mod.freq_mod(10, rate, 1,
+                                      lambda t: 100 + 20 * np.sin(t),
+                                      vectorized=True)
+        self.xs = xs + np.random.default_rng(0).normal(0, 0.3, len(xs))
+        self.b, self.a = sig.butter(4, 40 / (rate / 2))
+        self.res = mod.iq_demod(self.xs, self.ts, 100, self.a, self.b)
+
+    def process(self, demod, sizes):
+        freqs, ts = [], []
+        i, k = 0, 0
+        while i < len(self.xs):
+            n = sizes[k % len(sizes)]
+            f, t = demod(self.xs[i:i + n], self.ts[i:i + n])
+            freqs.append(f)
+            ts.append(t)
+            i += n
+            k += 1
+        return np.concatenate(freqs), np.concatenate(ts)
+
+    def test_same_as_iq_demod(self):
+        for sizes in [[4096], [1, 1, 7], [3, 1, 5, 17]]:
+            demod = mod.IqDemodulator(100, self.a, self.b)
+            res = self.process(demod, sizes)
+            self.assertTrue(np.array_equal(res[0], self.res[0]))
+            self.assertTrue(np.array_equal(res[1], self.res[1]))
+
+    def test_reset(self):
+        demod = mod.IqDemodulator(100, self.a, self.b)
+        self.process(demod, [1000])
+        demod.reset()
+        res = self.process(demod, [1000])
+        self.assertTrue(np.array_equal(res[0], self.res[0]))
+
+    def test_empty_block(self):
+        demod = mod.IqDemodulator(100, self.a, self.b)
+        f, t = demod([], [])
+        self.assertEqual(len(f) + len(t), 0)
+
+
 class Test_digital_hilbert_filter(unittest.TestCase):
     def test_filter_len(self):
         self.assertEqual(len(mod.digital_hilbert_filter(3)), 3)
@@ -132,6 +272,40 @@ class Test_linint(unittest.TestCase):
         self.assertEqual(np.nansum(x_new), 28)
         self.assertEqual(len(x_new), 10)
 
+    def test_nans_both_sides(self):
+        t = np.array([2, 3, 5])
+        x = np.array([1, 2, 4])
+        t_new = np.array([0, 1, 2, 4, 5, 6])
+        x_new = mod.linint(x, t, t_new)
+        self.assertTrue(np.array_equal(np.isnan(x_new),
+                                       [True, True, False, False, False,
+                                        True]))
+        self.assertEqual(list(x_new[2:5]), [1, 3, 4])
+
+    def test_single_point(self):
+        x_new = mod.linint(np.array([1]), np.array([1]), np.array([1, 2]))
+        self.assertTrue(np.all(np.isnan(x_new)))
+
+    def test_unsorted(self):
+        t = np.array([3, 0, 1, 4])
+        x = np.array([3, 0, 1, 4])
+        t_new = np.array([0, 0.5, 2, 3.5])
+        self.assertEqual(list(mod.linint(x, t, t_new)), [0, 0.5, 2, 3.5])
+
+    def test_same_as_segments(self):
+        rng = np.random.default_rng(1)
+        t = np.cumsum(rng.uniform(0.1, 1, 200))
+        x = rng.normal(size=200)
+        t_new = np.linspace(-1, t[-1] + 1, 1000)
+        x_ref = np.zeros(len(t_new)) * np.nan
+        for x_p, t_p, x_c, t_c in zip(x[:-1], t[:-1], x[1:], t[1:]):
+            slope = (x_c - x_p) / (t_c - t_p)
+            ind = (t_new >= t_p) & (t_new <= t_c)
+            x_ref[ind] = slope * t_new[ind] + x_p - slope * t_p
+        for assume_sorted in [False, True]:
+            x_new = mod.linint(x, t, t_new, assume_sorted=assume_sorted)
+            self.assertTrue(np.allclose(x_new, x_ref, equal_nan=True))
+
 
 class Test_wave_lens(unittest.TestCase):
     def test_touch(self):
@@ -168,3 +342,87 @@ class TestFreqByExtremums(unittest.TestCase):
     def test_single_wave(self):
         x = np.array([1, 0, -1,  0])
         self.assertAlmostEqual(mod.freq_by_extremums(x, 4), 1)
+
+
+def ref_envelope_by_extremums(xdata, tdata):
+    t_new, x_new = [], []
+    xabs = abs(xdata)
+    for x_l, x_c, x_r, t_c in zip(xabs[:-2], xabs[1:-1], xabs[2:],
+                                  tdata[1:-1]):
+        if (x_l < x_c) and (x_c >= x_r):
+            t_new.append(t_c)
+            x_new.append(x_c)
+    if xabs[-1] > xabs[-2]:
+        t_new.append(tdata[-1])
+        x_new.append(xabs[-1])
+    return np.array(x_new), np.array(t_new)
+
+
+def ref_freq_by_extremums(xdata, sample_rate):
+    max_total, min_total = 0, 0
+    for prev, curr, nxt in zip(xdata[:-2], xdata[1:-1], xdata[2:]):
+        if (prev < curr) and (curr >= nxt):
+            max_total += 1
+        if (prev > curr) and (curr <= nxt):
+            min_total += 1
+    if xdata[0] > xdata[1]:
+        max_total += 1
+    if xdata[0] < xdata[1]:
+        min_total += 1
+    return (max_total + min_total) / 2 / (len(xdata) / sample_rate)
+
+
+def ref_freq_by_zeros(xdata, sample_rate):
+    zeros_total = 0
+    for prev, curr in zip(xdata[:-1], xdata[1:]):
+        if prev * curr < 0:
+            zeros_total += 1
+        elif prev != 0 and curr == 0:
+            zeros_total += 1
+    return zeros_total / 2 / (len(xdata) / sample_rate)
+
+
+def ref_wave_lens(xdata, tdata):
+    tms = []
+    for t_c, x_p, x_c in zip(tdata[1:], xdata[:-1], xdata[1:]):
+        if x_p * x_c < 0:
+            tms.append(t_c)
+    return np.diff(tms) * 2, np.array(tms[1:])
+
+
+class TestExtremumsAndZerosRegression(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.signals = [
+            rng.integers(-3, 4, size=n).astype(float)
+            for n in [3, 4, 5, 10, 100, 1000]
+        ]
+        self.signals += [rng.normal(size=1000),
+                         np.cos(np.linspace(0, 20 * np.pi, 1001)),
+                         np.array([0, 1, 1, 0, -1, -1, 0, 0, 1, 0])]
+
+    def test_envelope_by_extremums(self):
+        for x in self.signals:
+            t = np.arange(len(x)) / 10
+            res = mod.envelope_by_extremums(x, tdata=t)
+            ref = ref_envelope_by_extremums(x, t)
+            for r, r_ref in zip(res, ref):
+                self.assertTrue(np.array_equal(r, r_ref))
+
+    def test_freq_by_extremums(self):
+        for x in self.signals:
+            self.assertEqual(mod.freq_by_extremums(x, 10),
+                             ref_freq_by_extremums(x, 10))
+
+    def test_freq_by_zeros(self):
+        for x in self.signals:
+            self.assertEqual(mod.freq_by_zeros(x, 10),
+                             ref_freq_by_zeros(x, 10))
+
+    def test_wave_lens(self):
+        for x in self.signals:
+            t = np.arange(len(x)) / 10
+            res = mod.wave_lens(x, t)
+            ref = ref_wave_lens(x, t)
+            for r, r_ref in zip(res, ref):
+                self.assertTrue(np.array_equal(r, r_ref))
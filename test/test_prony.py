@@ -15,7 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
-from dsplab.prony import prony_decomp
+import numpy as np
+from dsplab.prony import prony_decomp, prony_decomp_batch, PronyTracker
 
 
 class TestProny(unittest.TestCase):
@@ -46,3 +47,83 @@ class TestProny(unittest.TestCase):
         L = 10
         ms, cs, es = prony_decomp(x, L)
         self.assertEqual(len(ms) + len(cs) + len(es), 10 + 10 + 10)
+
+
+def damped_harms(tdata):
+    return (np.exp(-tdata) * np.cos(2 * np.pi * 5 * tdata)
+            + 0.5 * np.exp(-2 * tdata) * np.cos(2 * np.pi * 12 * tdata))
+
+
+class TestPronyVectorized(unittest.TestCase):
+    def test_reconstruction(self):
+        x = damped_harms(np.arange(200) / 100)
+        ms, cs, es = prony_decomp(x, 4)
+        self.assertTrue(np.allclose(np.sum(es, axis=0), x))
+        self.assertTrue(np.allclose(sorted(abs(ms)),
+                                    np.exp([-0.02, -0.02, -0.01, -0.01])))
+
+    def test_batch_same_as_single(self):
+        x = damped_harms(np.arange(600) / 100)
+        x += np.random.default_rng(0).normal(0, 1e-3, 600)
+        windows = np.lib.stride_tricks.sliding_window_view(x, 200)[::50]
+        ms, cs, es = prony_decomp_batch(windows, 4)
+        self.assertEqual(es.shape, (len(windows), 4, 200))
+        for window, m, c, e in zip(windows, ms, cs, es):
+            m_ref, c_ref, e_ref = prony_decomp(window, 4)
+            self.assertTrue(np.allclose(m, m_ref))
+            self.assertTrue(np.allclose(c, c_ref))
+            self.assertTrue(np.allclose(e, e_ref))
+
+    def test_batch_singular(self):
+        windows = np.zeros((3, 20))
+        windows[0] = damped_harms(np.arange(20) / 100)
+        ms, cs, es = prony_decomp_batch(windows, 2)
+        self.assertTrue(np.allclose(es[1:], 0))
+
+    def test_batch_rank_deficient(self):
+        t = np.arange(40)
+        for x, ncomp in [(np.ones(40), 4),
+                         (np.exp(-0.05 * t) * np.cos(0.3 * t), 6)]:
+            ms, cs, es = prony_decomp_batch(np.stack([x, x]), ncomp)
+            m_ref = prony_decomp(x, ncomp)[0]
+            self.assertTrue(np.all(np.isfinite(es)))
+            self.assertTrue(np.allclose(es.sum(axis=-2), x))
+            self.assertTrue(np.allclose(np.sort_complex(ms[0]),
+                                        np.sort_complex(m_ref)))
+
+    def test_batch_wrong_number_of_components(self):
+        self.assertIsNone(prony_decomp_batch(np.ones((2, 10)), 6))
+
+
+class TestPronyTracker(unittest.TestCase):
+    def setUp(self):
+        self.x = damped_harms(np.arange(1000) / 100)
+        self.x += np.random.default_rng(0).normal(0, 1e-3, 1000)
+
+    def test_same_as_prony_decomp(self):
+        for refresh in [None, 1, 7]:
+            tracker = PronyTracker(200, 4, refresh=refresh)
+            for i, sample in enumerate(self.x):
+                ms = tracker(sample)
+                if i < 199:
+                    self.assertIsNone(ms)
+                elif i % 50 == 0:
+                    window = self.x[i - 199:i + 1]
+                    self.assertTrue(np.array_equal(tracker.window, window))
+                    ms_ref, cs_ref, _ = prony_decomp(window, 4)
+                    self.assertTrue(np.allclose(np.sort_complex(ms),
+                                                np.sort_complex(ms_ref)))
+                    self.assertTrue(np.allclose(
+                        np.sum(tracker.c_vals()), np.sum(cs_ref)))
+
+    def test_reset(self):
+        tracker = PronyTracker(20, 2)
+        for sample in self.x[:30]:
+            tracker(sample)
+        tracker.reset()
+        self.assertEqual(len(tracker.window), 0)
+        self.assertIsNone(tracker(1))
+
+    def test_wrong_number_of_components(self):
+        with self.assertRaises(ValueError):
+            PronyTracker(10, 6)
@@ -0,0 +1,88 @@
+# Copyright (C) 2017-2022 Aleksandr Popov
+# Copyright (C) 2021-2022 Kirill Butin
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Lesser GNU General Public License for more details.
+
+# You should have received a copy of the Lesser GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from dsplab.recording import open_recording, save_meta, load_meta
+from dsplab.spectran import calc_specgram
+from dsplab.filtration import butter_filter
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.x = np.random.default_rng(0).normal(size=(3000, 2))
+        self.x = self.x.astype(np.float32)
+        self.raw_name = os.path.join(self.tmp_dir.name, 'rec.raw')
+        self.x.tofile(self.raw_name)
+        self.npy_name = os.path.join(self.tmp_dir.name, 'rec.npy')
+        np.save(self.npy_name, self.x)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_raw(self):
+        rec = open_recording(self.raw_name, 100, channels=2)
+        self.assertIsInstance(rec.data, np.memmap)
+        self.assertTrue(np.array_equal(rec.data, self.x))
+        self.assertEqual(len(rec), 3000)
+        self.assertEqual(rec.duration, 30)
+
+    def test_npy(self):
+        rec = open_recording(self.npy_name, 100)
+        self.assertIsInstance(rec.data, np.memmap)
+        self.assertTrue(np.array_equal(rec.data, self.x))
+
+    def test_meta(self):
+        save_meta(self.raw_name, 100, dtype=np.float32, channels=2,
+                  t_start=5)
+        self.assertEqual(load_meta(self.raw_name)['dtype'], '<f4')
+        rec = open_recording(self.raw_name)
+        self.assertEqual(rec.sample_rate, 100)
+        self.assertTrue(np.array_equal(rec.data, self.x))
+        self.assertTrue(np.allclose(rec.get_time(0, 2), [5, 5.01]))
+
+    def test_no_sample_rate(self):
+        with self.assertRaises(ValueError):
+            open_recording(self.raw_name)
+
+    def test_chunks(self):
+        rec = open_recording(self.raw_name, 100, channels=2)
+        chunks = list(rec.chunks(1000))
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(np.array_equal(np.concatenate(chunks), self.x))
+
+    def test_calc_specgram(self):
+        rec = open_recording(self.raw_name, 100, channels=2)
+        S, t = calc_specgram(rec.data, tdata=rec.get_time(), nseg=128,
+                             axis=0)
+        S_ref, t_ref = calc_specgram(self.x, tdata=rec.get_time(), nseg=128,
+                                     axis=0)
+        self.assertTrue(np.allclose(S, S_ref))
+        self.assertTrue(np.array_equal(t, t_ref))
+
+    def test_butter_filter_out(self):
+        rec = open_recording(self.raw_name, 100, channels=2)
+        out_name = os.path.join(self.tmp_dir.name, 'out.raw')
+        out = np.memmap(out_name, dtype=np.float64, mode='w+',
+                        shape=rec.data.shape)
+        res = butter_filter(rec.data, 100, [5.0, 10.0], 3, axis=0, out=out,
+                            chunk_len=700)
+        self.assertIs(res, out)
+        y_ref = butter_filter(self.x, 100, [5.0, 10.0], 3, axis=0)
+        self.assertTrue(np.allclose(out, y_ref))
@@ -15,8 +15,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
+import tracemalloc
 import numpy as np
-from dsplab.spectran import spectrum, stft, calc_specgram
+import scipy.signal as sig
+from dsplab.spectran import (spectrum, stft, calc_specgram, cache_info,
+                              cache_clear, SpectrumAnalyzer,
+                              StreamingSpectrogram, welch, WelchEstimator)
 
 
 class TestSpectrum(unittest.TestCase):
@@ -110,3 +114,252 @@ class TestSpecgram(unittest.TestCase):
         x = np.cos(2*np.pi*1*t)
         calc_specgram(x, sample_rate=fs)
         self.assertTrue(True)
+
+
+class TestChannels(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.xs = rng.normal(size=(3, 1000))
+
+    def test_spectrum(self):
+        for one_side in [False, True]:
+            X, f_X = spectrum(self.xs, 50, one_side=one_side, extra_len=1024)
+            X_tr = spectrum(self.xs.T, 50, one_side=one_side, extra_len=1024,
+                            axis=0)[0]
+            for x, X_ch in zip(self.xs, X):
+                X_ref, f_ref = spectrum(x, 50, one_side=one_side,
+                                        extra_len=1024)
+                self.assertTrue(np.allclose(X_ch, X_ref))
+                self.assertTrue(np.array_equal(f_X, f_ref))
+            self.assertTrue(np.allclose(X, X_tr.T))
+
+    def test_stft(self):
+        Xs = stft(self.xs, nseg=128, nstep=64, padded=True)
+        Xs_tr = stft(self.xs.T, nseg=128, nstep=64, padded=True, axis=0)
+        self.assertEqual(Xs.shape, (3, 15, 128))
+        for x, Xs_ch in zip(self.xs, Xs):
+            self.assertTrue(np.allclose(Xs_ch, stft(x, nseg=128, nstep=64,
+                                                    padded=True)))
+        self.assertTrue(np.allclose(Xs, Xs_tr))
+
+    def test_stft_short_signal(self):
+        Xs = stft(self.xs[:, :100], nseg=128)
+        self.assertEqual(Xs.shape, (3, 0, 128))
+
+    def test_calc_specgram(self):
+        S, t = calc_specgram(self.xs, sample_rate=50, nseg=128,
+                             freq_bounds=(1, 10))
+        for x, S_ch in zip(self.xs, S):
+            S_ref, t_ref = calc_specgram(x, sample_rate=50, nseg=128,
+                                         freq_bounds=(1, 10))
+            self.assertTrue(np.allclose(S_ch, S_ref))
+            self.assertTrue(np.array_equal(t, t_ref))
+
+
+class TestSTFTSegments(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=1000)
+
+    def test_same_as_spectrums_of_segments(self):
+        for nseg, nstep, nfft in [(128, 64, None), (100, 33, 256), (7, 7, 8)]:
+            Xs = stft(self.x, 50, nseg, nstep, nfft=nfft)
+            starts = range(0, len(self.x) - nseg + 1, nstep)
+            self.assertEqual(len(Xs), len(starts))
+            for i, X in zip(starts, Xs):
+                X_ref = spectrum(self.x[i:i + nseg], 50, extra_len=nfft,
+                                 save_energy=True)[0]
+                self.assertTrue(np.allclose(X, X_ref))
+
+    def test_one_side(self):
+        for nseg, nfft in [(128, None), (127, None), (100, 257)]:
+            Xs = stft(self.x, 50, nseg, nfft=nfft, one_side=True)
+            X_ref = spectrum(self.x[:nseg], 50, extra_len=nfft,
+                             save_energy=True, one_side=True)[0]
+            self.assertEqual(Xs.shape[-1], len(X_ref))
+            self.assertTrue(np.allclose(Xs[0], X_ref))
+
+    def test_padded_same_as_padded_signal(self):
+        for nseg, nstep in [(128, 64), (100, 30), (50, 80), (64, 200)]:
+            x_pad = np.zeros(1000 + (nseg - 1000 % nseg) % nseg)
+            x_pad[:1000] = self.x
+            Xs = stft(self.x, nseg=nseg, nstep=nstep, padded=True)
+            Xs_ref = stft(x_pad, nseg=nseg, nstep=nstep)
+            self.assertTrue(np.array_equal(Xs, Xs_ref))
+
+    def test_input_is_not_changed(self):
+        x = self.x.copy()
+        stft(x, nseg=64)
+        self.assertTrue(np.array_equal(x, self.x))
+
+
+class TestCache(unittest.TestCase):
+    def test_hits(self):
+        cache_clear()
+        x = np.ones(100)
+        spectrum(x, sample_rate=10)
+        spectrum(x + 1, sample_rate=10)
+        spectrum(x, sample_rate=20, window=('kaiser', 8))
+        info = cache_info()
+        self.assertEqual(info['windows'].hits, 1)
+        self.assertEqual(info['windows'].misses, 2)
+        self.assertEqual(info['freqs'].hits, 1)
+        self.assertEqual(info['freqs'].misses, 2)
+
+    def test_read_only(self):
+        f_X = spectrum(np.ones(100))[1]
+        with self.assertRaises(ValueError):
+            f_X[0] = 1
+
+    def test_one_side_freqs(self):
+        for n in [7, 8]:
+            f_X = spectrum(np.ones(n), one_side=True)[1]
+            f_ref = np.fft.fftfreq(n)
+            self.assertTrue(np.array_equal(f_X, f_ref[f_ref >= 0]))
+
+
+class TestSpectrumAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=1000)
+
+    def test_same_as_spectrum(self):
+        for kwargs in [{}, {'one_side': True}, {'return_amplitude': False},
+                       {'one_side': True, 'save_energy': True},
+                       {'window': ('kaiser', 8), 'one_side': True}]:
+            for nfft in [None, 1001, 1500]:
+                analyzer = SpectrumAnalyzer(1000, 50, nfft=nfft, **kwargs)
+                X_ref, f_ref = spectrum(self.x, 50, extra_len=nfft,
+                                        **kwargs)
+                self.assertTrue(np.allclose(analyzer(self.x), X_ref))
+                self.assertTrue(np.array_equal(analyzer.freqs, f_ref))
+
+    def test_out(self):
+        analyzer = SpectrumAnalyzer(1000, one_side=True)
+        out = np.empty(len(analyzer.freqs))
+        res = analyzer(self.x, out=out)
+        self.assertIs(res, out)
+        self.assertTrue(np.allclose(out, spectrum(self.x, one_side=True)[0]))
+
+    @unittest.skipIf(np.lib.NumpyVersion(np.__version__) < '2.0.0',
+                     'FFT functions have no out argument')
+    def test_no_allocations(self):
+        analyzer = SpectrumAnalyzer(1000, one_side=True)
+        out = np.empty(len(analyzer.freqs))
+        analyzer(self.x, out=out)
+        tracemalloc.start()
+        for _ in range(10):
+            analyzer(self.x, out=out)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, self.x.nbytes)
+
+
+def chunked(x, sizes):
+    chunks = []
+    start = 0
+    while start < x.shape[-1]:
+        for size in sizes:
+            chunks.append(x[..., start:start + size])
+            start += size
+    return chunks
+
+
+class TestStreamingSpectrogram(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=1000)
+        self.t = np.arange(1000) / 50
+
+    def calc(self, specgram, chunks):
+        res = [specgram.update(chunk) for chunk in chunks]
+        res.append(specgram.flush())
+        S = np.concatenate([r[0] for r in res], axis=-1)
+        t = np.concatenate([r[1] for r in res])
+        return S, t
+
+    def test_same_as_calc_specgram(self):
+        for nseg, nstep in [(128, None), (100, 30), (64, 64), (50, 80)]:
+            S_ref, t_ref = calc_specgram(self.x, tdata=self.t, nseg=nseg,
+                                         nstep=nstep, freq_bounds=(1, 10),
+                                         extra_len=256)
+            for sizes in [[1000], [1], [7, 200, 33], [128]]:
+                specgram = StreamingSpectrogram(50, nseg=nseg, nstep=nstep,
+                                                freq_bounds=(1, 10),
+                                                extra_len=256)
+                S, t = self.calc(specgram, chunked(self.x, sizes))
+                self.assertTrue(np.allclose(S, S_ref))
+                self.assertEqual(t[0], t_ref[0])
+
+    def test_time(self):
+        specgram = StreamingSpectrogram(50, nseg=100, nstep=50, t_start=2)
+        S, t = self.calc(specgram, chunked(self.x, [33]))
+        S_ref, t_ref = calc_specgram(self.x, tdata=self.t + 2, nseg=100)
+        self.assertTrue(np.allclose(t, t_ref))
+
+    def test_time_no_tdata(self):
+        specgram = StreamingSpectrogram(50, nseg=100, nstep=50)
+        S, t = self.calc(specgram, chunked(self.x, [33]))
+        S_ref, t_ref = calc_specgram(self.x, sample_rate=50, nseg=100)
+        self.assertTrue(np.allclose(t, t_ref))
+        self.assertAlmostEqual(t_ref[0], 99 / 50)
+        self.assertAlmostEqual(t_ref[-1], 999 / 50)
+
+    def test_columns(self):
+        specgram = StreamingSpectrogram(50, nseg=128)
+        cols = list(specgram.columns(chunked(self.x, [10, 90]),
+                                     pad_end=True))
+        S_ref, t_ref = calc_specgram(self.x, tdata=self.t, nseg=128)
+        self.assertEqual(len(cols), len(t_ref))
+        for i, (col, t_col) in enumerate(cols):
+            self.assertTrue(np.allclose(col, S_ref[:, i]))
+
+    def test_channels(self):
+        xs = np.random.default_rng(1).normal(size=(3, 1000))
+        specgram = StreamingSpectrogram(50, nseg=128)
+        S, t = self.calc(specgram, chunked(xs, [70]))
+        S_ref = calc_specgram(xs, tdata=self.t, nseg=128)[0]
+        self.assertTrue(np.allclose(S, S_ref))
+
+
+class TestWelch(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(0).normal(size=5000)
+
+    def test_same_as_scipy(self):
+        for nseg, nstep, nfft in [(256, None, None), (100, 30, None),
+                                  (128, 128, 255), (127, 50, None)]:
+            if nstep is None:
+                noverlap = None
+            else:
+                noverlap = nseg - nstep
+            f_ref, P_ref = sig.welch(self.x, 50, window='hamming',
+                                     nperseg=nseg, noverlap=noverlap,
+                                     nfft=nfft, detrend=False)
+            P, f = welch(self.x, 50, nseg=nseg, nstep=nstep, nfft=nfft)
+            self.assertTrue(np.allclose(P, P_ref))
+            self.assertTrue(np.allclose(f, f_ref))
+
+    def test_two_side(self):
+        f_ref, P_ref = sig.welch(self.x, 50, window='hamming', nperseg=128,
+                                 detrend=False, return_onesided=False)
+        P, f = welch(self.x, 50, nseg=128, one_side=False)
+        self.assertTrue(np.allclose(P, P_ref))
+        self.assertTrue(np.allclose(f, f_ref))
+
+    def test_updates(self):
+        P_ref = welch(self.x, 50, nseg=100, nstep=70)[0]
+        for sizes in [[1], [17, 300], [5000]]:
+            estimator = WelchEstimator(50, nseg=100, nstep=70, batch=3)
+            for chunk in chunked(self.x, sizes):
+                estimator.update(chunk)
+            self.assertEqual(estimator.segs_total, 71)
+            self.assertTrue(np.allclose(estimator.psd(), P_ref))
+
+    def test_channels(self):
+        xs = np.random.default_rng(1).normal(size=(3, 1000))
+        P = welch(xs.T, nseg=64, axis=0)[0]
+        for x, P_ch in zip(xs, P.T):
+            self.assertTrue(np.allclose(P_ch, welch(x, nseg=64)[0]))
+
+    def test_no_segments(self):
+        estimator = WelchEstimator(nseg=100)
+        estimator.update(np.ones(50))
+        self.assertTrue(np.array_equal(estimator.psd(), np.zeros(51)))